@@ -28,13 +28,14 @@ def create_app() -> Flask:
     config = get_config()
     app.config.update(config)
     
-    # Initialize database only once (not per worker)
-    # In production with Gunicorn, init_db should be called separately
-    # before starting workers, or use a migration system
+    # Apply pending migrations. Only one process migrates (file lock);
+    # when the schema is current this is a read-only version check, so
+    # Gunicorn workers do no DDL. In production run
+    # "python -m app_latest.migrations" before starting workers.
     if config['INIT_DB_ON_START']:
         try:
-            from app_latest.database import init_db
-            init_db(config['DATABASE_PATH'])
+            from app_latest.migrations import migrate
+            migrate(config['DATABASE_PATH'], config)
         except Exception as e:
             logger.error(f"Failed to initialize database: {e}", exc_info=True)
             # In production, you might want to fail fast here
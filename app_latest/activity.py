@@ -0,0 +1,493 @@
+"""
+Active user registry shared by all worker processes on a host.
+
+Activity is recorded in the SQLite ``active_users`` table (migration
+0003), so every Gunicorn worker answers "who was active recently" the
+same way. Writes are coalesced: ``touch`` only updates an in-process
+buffer, and a background thread flushes it once per
+``ACTIVE_USERS_FLUSH_INTERVAL`` seconds as a single upsert transaction,
+keeping at most ``ACTIVE_USERS_CAPACITY`` rows and adjusting the row
+total in ``active_user_totals`` (migration 0006). Reads are plain indexed
+queries that never wait for writers under WAL. A user's activity becomes
+visible to other workers within one flush interval.
+
+Distinct users per sliding window (e.g. 1/5/15 minutes) come from the
+``active_user_buckets`` table (migration 0004): one counter per
+fixed-width time bucket, holding the users whose *latest* activity is in
+that bucket. When a user's last activity moves to a newer bucket the old
+counter is decremented and the new one incremented, so an update is O(1)
+and a window count is a sum over at most ``window / bucket_seconds``
+rows. Buckets older than the longest window are deleted, and rows of
+users active within it are never trimmed, which keeps the counts exact
+up to bucket granularity.
+
+Approximate distinct users per hour and per day come from HyperLogLog
+sketches (``app_latest.sketches``): every ``touch`` adds the user to this
+worker's sketch for the current hour and day, and each flush merges those
+sketches into the ``activity_sketches`` table (migration 0005). Memory is
+fixed per period regardless of how many users are active.
+"""
+
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app_latest.cache import RecencyTracker
+from app_latest.database import get_db_connection
+from app_latest.sketches import DEFAULT_PRECISION, HyperLogLog
+
+
+logger = logging.getLogger(__name__)
+
+# Sketch period kinds and their lengths in seconds (UTC-aligned)
+SKETCH_PERIODS = {'hour': 3600, 'day': 86400}
+# Most periods one query may decode and merge (one week of hours, a month of days)
+SKETCH_MAX_PERIODS = {'hour': 168, 'day': 31}
+
+_BUCKET_INCREMENT_SQL = """
+    INSERT INTO active_user_buckets (bucket, users) VALUES (?, 1)
+    ON CONFLICT (bucket) DO UPDATE SET users = users + 1
+"""
+
+
+class ActiveUserRegistry:
+    """
+    Coalescing writer and reader for the shared ``active_users`` table.
+    
+    Repeated activity of the same user between flushes costs one dict
+    update; each flush is one transaction regardless of request volume.
+    """
+    
+    def __init__(
+        self,
+        database_path: str,
+        capacity: int = 10000,
+        flush_interval: float = 1.0,
+        bucket_seconds: int = 10,
+        retention: float = 900.0,
+        sketch_precision: int = DEFAULT_PRECISION,
+        sketch_retention_days: int = 30
+    ) -> None:
+        if bucket_seconds < 1:
+            raise ValueError("bucket_seconds must be at least 1")
+        
+        self.database_path = database_path
+        self.capacity = capacity
+        self.flush_interval = max(0.01, flush_interval)
+        self.bucket_seconds = bucket_seconds
+        self.retention = retention
+        self.sketch_precision = sketch_precision
+        self.sketch_retention_days = sketch_retention_days
+        
+        # Unflushed activity of this worker, bounded like the shared table
+        self._pending = RecencyTracker(capacity=capacity)
+        # Unflushed sketches keyed by (period kind, period start)
+        self._sketches: Dict[Tuple[str, int], HyperLogLog] = {}
+        self._sketches_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+    
+    def touch(self, user_id: int, seen_at: Optional[float] = None) -> None:
+        """
+        Record user activity; it is written at the next flush.
+        
+        Args:
+            user_id: Active user ID.
+            seen_at: Unix timestamp of the activity (defaults to now).
+        """
+        seen_at = seen_at if seen_at is not None else time.time()
+        self._pending.touch(user_id, seen_at)
+        
+        with self._sketches_lock:
+            for period, seconds in SKETCH_PERIODS.items():
+                key = (period, int(seen_at // seconds) * seconds)
+                sketch = self._sketches.get(key)
+                if sketch is None:
+                    sketch = self._sketches[key] = HyperLogLog(self.sketch_precision)
+                sketch.add(user_id)
+        
+        if self._thread is None:
+            self._start()
+    
+    def _start(self) -> None:
+        """Start the flush thread once."""
+        with self._thread_lock:
+            if self._thread is None and not self._stop.is_set():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name=f"active-users-flusher:{self.database_path}",
+                    daemon=True
+                )
+                self._thread.start()
+    
+    def _run(self) -> None:
+        """Flush thread main loop."""
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+    
+    def flush(self) -> int:
+        """
+        Write buffered activity to the shared table and trim it to capacity.
+        
+        Failed writes are put back into the buffer for the next flush.
+        
+        Returns:
+            Number of users written.
+        """
+        with self._flush_lock:
+            entries = self._pending.drain()
+            with self._sketches_lock:
+                sketches, self._sketches = self._sketches, {}
+            if not entries and not sketches:
+                return 0
+            
+            try:
+                with get_db_connection(self.database_path) as conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    added = self._apply(conn, entries)
+                    self._merge_sketches(conn, sketches)
+                    removed = self._trim(conn)
+                    if added != removed:
+                        conn.execute(
+                            "UPDATE active_user_totals SET users = users + ? WHERE id = 1",
+                            (added - removed,)
+                        )
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to flush {len(entries)} active users: {e}")
+                for user_id, seen_at in entries:
+                    if user_id not in self._pending:
+                        self._pending.touch(user_id, seen_at)
+                with self._sketches_lock:
+                    for key, sketch in sketches.items():
+                        current = self._sketches.get(key)
+                        self._sketches[key] = sketch.merge(current) if current else sketch
+                return 0
+            return len(entries)
+    
+    def _bucket(self, timestamp: float) -> int:
+        """Get the time bucket a Unix timestamp falls into."""
+        return int(timestamp // self.bucket_seconds)
+    
+    def _apply(self, conn: sqlite3.Connection, entries: Iterable[Tuple[int, float]]) -> int:
+        """
+        Upsert activity and move users between bucket counters.
+        
+        Keeps the later timestamp when two workers report the same user.
+        
+        Args:
+            conn: Connection inside the flush transaction.
+            entries: (user ID, activity timestamp) pairs.
+            
+        Returns:
+            Number of users inserted into the shared table.
+        """
+        added = 0
+        for user_id, seen_at in entries:
+            row = conn.execute(
+                "SELECT last_active_at FROM active_users WHERE user_id = ?",
+                (user_id,)
+            ).fetchone()
+            
+            if row is None:
+                conn.execute(
+                    "INSERT INTO active_users (user_id, last_active_at) VALUES (?, ?)",
+                    (user_id, seen_at)
+                )
+                conn.execute(_BUCKET_INCREMENT_SQL, (self._bucket(seen_at),))
+                added += 1
+                continue
+            
+            previous = row['last_active_at']
+            if seen_at <= previous:
+                continue
+            
+            conn.execute(
+                "UPDATE active_users SET last_active_at = ? WHERE user_id = ?",
+                (seen_at, user_id)
+            )
+            old_bucket, new_bucket = self._bucket(previous), self._bucket(seen_at)
+            if old_bucket != new_bucket:
+                conn.execute(
+                    "UPDATE active_user_buckets SET users = users - 1 WHERE bucket = ?",
+                    (old_bucket,)
+                )
+                conn.execute(_BUCKET_INCREMENT_SQL, (new_bucket,))
+        return added
+    
+    def _merge_sketches(
+        self,
+        conn: sqlite3.Connection,
+        sketches: Dict[Tuple[str, int], HyperLogLog]
+    ) -> None:
+        """
+        Merge this worker's sketches into the shared ones.
+        
+        Args:
+            conn: Connection inside the flush transaction.
+            sketches: Sketches keyed by (period kind, period start).
+        """
+        for (period, period_start), sketch in sketches.items():
+            row = conn.execute(
+                "SELECT sketch FROM activity_sketches WHERE period = ? AND period_start = ?",
+                (period, period_start)
+            ).fetchone()
+            if row is not None:
+                try:
+                    sketch = HyperLogLog.from_bytes(row['sketch']).merge(sketch)
+                except ValueError as e:
+                    logger.warning(f"Replacing invalid {period} sketch {period_start}: {e}")
+            conn.execute(
+                "INSERT OR REPLACE INTO activity_sketches (period, period_start, sketch) "
+                "VALUES (?, ?, ?)",
+                (period, period_start, sketch.to_bytes())
+            )
+    
+    def _trim(self, conn: sqlite3.Connection) -> int:
+        """
+        Drop expired buckets and sketches, and the least recently active rows
+        beyond capacity.
+        
+        Rows active within ``retention`` are kept even beyond capacity, so
+        a returning user is never counted twice.
+        
+        Args:
+            conn: Connection inside the flush transaction.
+            
+        Returns:
+            Number of users removed from the shared table.
+        """
+        now = time.time()
+        horizon = now - self.retention
+        conn.execute(
+            "DELETE FROM active_user_buckets WHERE bucket < ?",
+            (self._bucket(horizon),)
+        )
+        # Filter on the leading primary key column so the delete uses the index
+        conn.executemany(
+            "DELETE FROM activity_sketches WHERE period = ? AND period_start < ?",
+            [(period, now - self.sketch_retention_days * 86400) for period in SKETCH_PERIODS]
+        )
+        
+        row = conn.execute(
+            "SELECT last_active_at FROM active_users "
+            "ORDER BY last_active_at DESC LIMIT 1 OFFSET ?",
+            (self.capacity,)
+        ).fetchone()
+        if row is None:
+            return 0
+        return conn.execute(
+            "DELETE FROM active_users WHERE last_active_at <= ?",
+            (min(row['last_active_at'], horizon),)
+        ).rowcount
+    
+    def recent(self, limit: int) -> List[Tuple[int, float]]:
+        """
+        Get the most recently active users across all workers.
+        
+        Args:
+            limit: Maximum number of users.
+            
+        Returns:
+            List of (user ID, last active timestamp), most recent first.
+            
+        Raises:
+            sqlite3.Error: If the query fails.
+        """
+        with get_db_connection(self.database_path) as conn:
+            rows = conn.execute(
+                "SELECT user_id, last_active_at FROM active_users "
+                "ORDER BY last_active_at DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [(row['user_id'], row['last_active_at']) for row in rows]
+    
+    def window_counts(self, windows: Iterable[int]) -> Dict[int, int]:
+        """
+        Count distinct users active in each sliding window, across all workers.
+        
+        Windows are aligned to bucket boundaries, so a window of N seconds
+        covers between N and N + ``bucket_seconds`` seconds.
+        
+        Args:
+            windows: Window lengths in seconds (at most ``retention``).
+            
+        Returns:
+            Dictionary mapping window length to distinct user count.
+            
+        Raises:
+            sqlite3.Error: If the query fails.
+        """
+        now = time.time()
+        with get_db_connection(self.database_path) as conn:
+            rows = conn.execute(
+                "SELECT bucket, users FROM active_user_buckets WHERE bucket >= ?",
+                (self._bucket(now - self.retention),)
+            ).fetchall()
+        
+        buckets = [(row['bucket'], row['users']) for row in rows]
+        return {
+            window: sum(users for bucket, users in buckets if bucket >= self._bucket(now - window))
+            for window in windows
+        }
+    
+    def distinct_counts(self, period: str, periods: int) -> Dict[str, Any]:
+        """
+        Estimate distinct active users per period, across all workers.
+        
+        Args:
+            period: Period kind, ``hour`` or ``day``.
+            periods: Number of most recent periods, the current one included.
+            
+        Returns:
+            Dictionary with ``periods`` (list of ``start``/``users``, newest
+            first) and ``total`` (distinct users over all of them).
+            
+        Raises:
+            ValueError: If the period kind is unknown.
+            sqlite3.Error: If the query fails.
+        """
+        if period not in SKETCH_PERIODS:
+            raise ValueError(f"period must be one of {', '.join(SKETCH_PERIODS)}")
+        
+        seconds = SKETCH_PERIODS[period]
+        current_start = int(time.time() // seconds) * seconds
+        with get_db_connection(self.database_path) as conn:
+            rows = conn.execute(
+                "SELECT period_start, sketch FROM activity_sketches "
+                "WHERE period = ? AND period_start > ? ORDER BY period_start DESC",
+                (period, current_start - periods * seconds)
+            ).fetchall()
+        
+        result: List[Dict[str, Any]] = []
+        union: Optional[HyperLogLog] = None
+        for row in rows:
+            try:
+                sketch = HyperLogLog.from_bytes(row['sketch'])
+            except ValueError as e:
+                logger.warning(f"Skipping invalid {period} sketch {row['period_start']}: {e}")
+                continue
+            result.append({'start': row['period_start'], 'users': sketch.count()})
+            union = sketch if union is None else union.merge(sketch)
+        
+        return {'periods': result, 'total': union.count() if union is not None else 0}
+    
+    def count(self) -> int:
+        """
+        Count users in the shared table.
+        
+        Reads the total kept by the flush transactions, so it is O(1).
+        
+        Returns:
+            Number of tracked users.
+            
+        Raises:
+            sqlite3.Error: If the query fails.
+        """
+        with get_db_connection(self.database_path) as conn:
+            row = conn.execute("SELECT users FROM active_user_totals WHERE id = 1").fetchone()
+        return row['users'] if row is not None else 0
+    
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the flush thread and write remaining activity.
+        
+        Args:
+            timeout: Seconds to wait for the flush thread to finish.
+        """
+        self._stop.set()
+        with self._thread_lock:
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self.flush()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get registry settings and buffer size.
+        
+        Returns:
+            Dictionary with capacity, flush interval, bucket width and
+            pending count.
+        """
+        return {
+            'capacity': self.capacity,
+            'flush_interval': self.flush_interval,
+            'bucket_seconds': self.bucket_seconds,
+            'pending': len(self._pending),
+        }
+
+
+# Registries are per worker process: threads do not survive a fork
+_registries: Dict[str, ActiveUserRegistry] = {}
+_registries_pid: Optional[int] = None
+_registries_lock = threading.Lock()
+
+
+def get_registry(
+    database_path: str,
+    capacity: int = 10000,
+    flush_interval: float = 1.0,
+    bucket_seconds: int = 10,
+    retention: float = 900.0,
+    sketch_precision: int = DEFAULT_PRECISION,
+    sketch_retention_days: int = 30
+) -> ActiveUserRegistry:
+    """
+    Get (or lazily create) the active user registry for a database.
+    
+    Args:
+        database_path: Path to SQLite database file.
+        capacity: Maximum users kept in the shared table for a new registry.
+        flush_interval: Seconds between flushes for a new registry.
+        bucket_seconds: Time bucket width for a new registry.
+        retention: Seconds of bucket history kept (the longest window).
+        sketch_precision: HyperLogLog precision for a new registry.
+        sketch_retention_days: Days of hour/day sketches kept.
+        
+    Returns:
+        Registry owned by the current process.
+    """
+    global _registries_pid
+    
+    with _registries_lock:
+        if _registries_pid != os.getpid():
+            _registries.clear()
+            _registries_pid = os.getpid()
+        
+        registry = _registries.get(database_path)
+        if registry is None:
+            registry = ActiveUserRegistry(
+                database_path,
+                capacity,
+                flush_interval,
+                bucket_seconds,
+                retention,
+                sketch_precision,
+                sketch_retention_days
+            )
+            _registries[database_path] = registry
+        return registry
+
+
+def close_all_registries(timeout: Optional[float] = None) -> None:
+    """
+    Stop every registry in this process after flushing buffered activity.
+    
+    Args:
+        timeout: Seconds to wait for each flush thread.
+    """
+    with _registries_lock:
+        registries = list(_registries.values()) if _registries_pid == os.getpid() else []
+        _registries.clear()
+    for registry in registries:
+        registry.close(timeout)
+
+
+# Flush buffered activity when a worker exits normally
+atexit.register(close_all_registries)
@@ -0,0 +1,220 @@
+"""
+In-process caching utilities.
+
+Provides a thread-safe, size-bounded LRU cache with optional TTL and a
+bounded recency tracker for "recently seen" sets such as active users.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache with optional per-entry TTL.
+    
+    All operations are O(1). A ``max_size`` of 0 disables the cache:
+    ``set`` stores nothing and every ``get`` is a miss.
+    """
+    
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None) -> None:
+        if max_size < 0:
+            raise ValueError("Cache max_size must not be negative")
+        
+        self.max_size = max_size
+        self.ttl = ttl if ttl and ttl > 0 else None
+        
+        self._data: 'OrderedDict[Hashable, Tuple[Any, Optional[float]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a cached value and mark it as most recently used.
+        
+        Args:
+            key: Cache key.
+            default: Value returned on a miss.
+            
+        Returns:
+            Cached value, or ``default`` if absent or expired.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._misses += 1
+                return default
+            
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self._expirations += 1
+                self._misses += 1
+                return default
+            
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entry if full.
+        
+        Args:
+            key: Cache key.
+            value: Value to cache.
+            ttl: Per-entry TTL in seconds (defaults to the cache TTL).
+        """
+        if self.max_size == 0:
+            return
+        
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self._evictions += 1
+    
+    def invalidate(self, key: Hashable) -> bool:
+        """
+        Remove a key from the cache.
+        
+        Args:
+            key: Cache key.
+            
+        Returns:
+            True if the key was cached.
+        """
+        with self._lock:
+            if self._data.pop(key, None) is None:
+                return False
+            self._invalidations += 1
+            return True
+    
+    def clear(self) -> None:
+        """Remove all entries (counters are kept)."""
+        with self._lock:
+            self._invalidations += len(self._data)
+            self._data.clear()
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+        
+        Returns:
+            Dictionary with size and hit/miss/eviction counters.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'max_size': self.max_size,
+                'size': len(self._data),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': self._hits / lookups if lookups else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'invalidations': self._invalidations,
+            }
+
+
+class RecencyTracker:
+    """
+    Thread-safe set of recently seen keys, most recent first.
+    
+    Touching a key moves it to the front; once ``capacity`` keys are
+    tracked, the least recently seen one is dropped. ``touch`` and
+    ``discard`` are O(1); ``recent`` is O(limit).
+    """
+    
+    def __init__(self, capacity: int = 1000) -> None:
+        if capacity < 1:
+            raise ValueError("Tracker capacity must be at least 1")
+        
+        self.capacity = capacity
+        
+        # key -> wall-clock time it was last seen; oldest first
+        self._data: 'OrderedDict[Hashable, float]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def touch(self, key: Hashable, seen_at: Optional[float] = None) -> None:
+        """
+        Mark a key as seen now, moving it to the front.
+        
+        Args:
+            key: Key to mark.
+            seen_at: Unix timestamp to record (defaults to now).
+        """
+        seen_at = seen_at if seen_at is not None else time.time()
+        
+        with self._lock:
+            self._data[key] = seen_at
+            self._data.move_to_end(key)
+            if len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+    
+    def discard(self, key: Hashable) -> bool:
+        """
+        Stop tracking a key.
+        
+        Args:
+            key: Key to remove.
+            
+        Returns:
+            True if the key was tracked.
+        """
+        with self._lock:
+            return self._data.pop(key, None) is not None
+    
+    def recent(self, limit: Optional[int] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Get the most recently seen keys.
+        
+        Args:
+            limit: Maximum number of keys (all if None).
+            
+        Returns:
+            List of (key, last seen timestamp), most recent first.
+        """
+        with self._lock:
+            count = len(self._data) if limit is None else min(limit, len(self._data))
+            entries = reversed(self._data.items())
+            return [next(entries) for _ in range(count)]
+    
+    def drain(self) -> List[Tuple[Hashable, float]]:
+        """
+        Remove and return all tracked keys.
+        
+        Returns:
+            List of (key, last seen timestamp), least recent first.
+        """
+        with self._lock:
+            entries = list(self._data.items())
+            self._data.clear()
+            return entries
+    
+    def clear(self) -> None:
+        """Stop tracking all keys."""
+        with self._lock:
+            self._data.clear()
+    
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
@@ -0,0 +1,288 @@
+"""
+Password hashing work-factor calibration command-line tool.
+
+Measures password hashing speed on the current machine and picks the
+PBKDF2-SHA256 iteration count that takes about ``--target-ms`` per hash,
+never fewer than the current policy (``MIN_PBKDF2_ITERATIONS``). With
+``--method scrypt`` it benchmarks scrypt over a range of N values,
+reporting time, throughput and memory per hash, and picks the largest N
+that meets the target and fits ``--memory-budget-mb`` with
+``--concurrency`` hashes running at once (one per hashing process).
+
+The result is written to a JSON calibration file; point
+``HASH_CALIBRATION_FILE`` at it so ``get_config`` uses the calibrated
+parameters when they are not set explicitly in the environment.
+
+Usage:
+    python -m app_latest.calibrate [--target-ms 50] [--output hash_calibration.json]
+    python -m app_latest.calibrate --method scrypt --memory-budget-mb 256
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from werkzeug.security import generate_password_hash
+
+from app_latest.config import MIN_PBKDF2_ITERATIONS
+from app_latest.hash_executor import pool_size
+from app_latest.security import scrypt_memory_bytes
+
+
+# scrypt N values benchmarked: 2**14 (16 MiB at r=8) up to 2**20 (1 GiB)
+SCRYPT_LOG2_N_RANGE = range(14, 21)
+
+
+def _measure_ms(method: str, samples: int) -> float:
+    """
+    Measure the median time of one password hash.
+    
+    Args:
+        method: Werkzeug hash method with parameters.
+        samples: Number of timed hashes.
+        
+    Returns:
+        Median hashing time in milliseconds.
+    """
+    timings: List[float] = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        generate_password_hash('calibration-password', method=method)
+        timings.append((time.perf_counter() - started) * 1000.0)
+    return statistics.median(timings)
+
+
+def measure_hash_ms(iterations: int, samples: int = 5) -> float:
+    """
+    Measure the median time of one PBKDF2-SHA256 password hash.
+    
+    Args:
+        iterations: PBKDF2 iteration count.
+        samples: Number of timed hashes.
+        
+    Returns:
+        Median hashing time in milliseconds.
+    """
+    return _measure_ms(f'pbkdf2:sha256:{iterations}', samples)
+
+
+def calibrate_pbkdf2(target_ms: float, samples: int = 5) -> Dict[str, Any]:
+    """
+    Find the iteration count whose hash time is closest to the target.
+    
+    Never goes below ``MIN_PBKDF2_ITERATIONS`` (the current policy): if the
+    floor is slower than the target, the machine lacks hashing capacity
+    for that target and the result says so instead of weakening hashes.
+    
+    Args:
+        target_ms: Desired time per hash in milliseconds.
+        samples: Timed hashes per measurement.
+        
+    Returns:
+        Dictionary with the chosen iteration count, measured time and
+        estimated hashing capacity.
+    """
+    # Hash time is linear in iterations: extrapolate from a probe, then
+    # refine once at the estimate to absorb fixed per-hash overhead
+    probe = 50_000
+    per_iteration = measure_hash_ms(probe, samples) / probe
+    iterations = int(target_ms / per_iteration)
+    measured = measure_hash_ms(iterations, samples)
+    iterations = int(iterations * target_ms / measured)
+    
+    below_minimum = iterations < MIN_PBKDF2_ITERATIONS
+    iterations = max(MIN_PBKDF2_ITERATIONS, round(iterations, -3))
+    measured = measure_hash_ms(iterations, samples)
+    cpu_count = os.cpu_count() or 1
+    
+    return {
+        'method': 'pbkdf2:sha256',
+        'pbkdf2_iterations': iterations,
+        'target_ms': target_ms,
+        'target_below_minimum': below_minimum,
+        'measured_ms': round(measured, 2),
+        'hashes_per_second_per_core': round(1000.0 / measured, 1),
+        'cpu_count': cpu_count,
+        'hashes_per_second_per_node': round(cpu_count * 1000.0 / measured, 1),
+        'calibrated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+
+
+def benchmark_scrypt(
+    r: int = 8,
+    p: int = 1,
+    samples: int = 3,
+    max_ms: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Benchmark scrypt hashing over ``SCRYPT_LOG2_N_RANGE``.
+    
+    Args:
+        r: Block size.
+        p: Parallelization factor.
+        samples: Timed hashes per N.
+        max_ms: Stop after the first N slower than this.
+        
+    Returns:
+        One row per N with time, throughput and memory per hash.
+    """
+    rows: List[Dict[str, Any]] = []
+    for log2_n in SCRYPT_LOG2_N_RANGE:
+        n = 2 ** log2_n
+        measured = _measure_ms(f'scrypt:{n}:{r}:{p}', samples)
+        rows.append({
+            'scrypt_n': n,
+            'scrypt_r': r,
+            'scrypt_p': p,
+            'measured_ms': round(measured, 2),
+            'hashes_per_second_per_core': round(1000.0 / measured, 1),
+            'memory_mib_per_hash': scrypt_memory_bytes(n, r) / 2 ** 20,
+        })
+        if max_ms is not None and measured > max_ms:
+            break
+    return rows
+
+
+def calibrate_scrypt(
+    target_ms: float,
+    memory_budget_mb: float,
+    concurrency: int,
+    r: int = 8,
+    p: int = 1,
+    samples: int = 3
+) -> Dict[str, Any]:
+    """
+    Pick the largest scrypt N within the time target and memory budget.
+    
+    Args:
+        target_ms: Desired maximum time per hash in milliseconds.
+        memory_budget_mb: Memory available for hashing per app worker.
+        concurrency: Hashes that may run at once (hashing processes).
+        r: Block size.
+        p: Parallelization factor.
+        samples: Timed hashes per N.
+        
+    Returns:
+        Dictionary with chosen parameters, their measurements and the
+        full benchmark table.
+    """
+    rows = benchmark_scrypt(r, p, samples, max_ms=target_ms * 2)
+    for row in rows:
+        row['fits'] = (
+            row['measured_ms'] <= target_ms
+            and row['memory_mib_per_hash'] * concurrency <= memory_budget_mb
+        )
+    
+    fitting = [row for row in rows if row['fits']]
+    chosen = fitting[-1] if fitting else rows[0]
+    cpu_count = os.cpu_count() or 1
+    
+    return {
+        'method': 'scrypt',
+        'scrypt_n': chosen['scrypt_n'],
+        'scrypt_r': r,
+        'scrypt_p': p,
+        'target_ms': target_ms,
+        'memory_budget_mb': memory_budget_mb,
+        'concurrency': concurrency,
+        'fits_budget': bool(fitting),
+        'measured_ms': chosen['measured_ms'],
+        'memory_mib_per_hash': chosen['memory_mib_per_hash'],
+        'peak_memory_mib': chosen['memory_mib_per_hash'] * concurrency,
+        'hashes_per_second_per_core': chosen['hashes_per_second_per_core'],
+        'cpu_count': cpu_count,
+        'hashes_per_second_per_node': round(
+            min(cpu_count, concurrency) * chosen['hashes_per_second_per_core'], 1
+        ),
+        'calibrated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'benchmark': rows,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the calibration CLI.
+    
+    Args:
+        argv: Command-line arguments (defaults to ``sys.argv[1:]``).
+        
+    Returns:
+        Process exit code.
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m app_latest.calibrate',
+        description='Calibrate the password hashing work factor for this machine.'
+    )
+    parser.add_argument('--method', choices=['pbkdf2', 'scrypt'], default='pbkdf2')
+    parser.add_argument('--target-ms', type=float, default=50.0, help='Target time per hash')
+    parser.add_argument(
+        '--memory-budget-mb',
+        type=float,
+        default=256.0,
+        help='scrypt: memory for concurrent hashes per app worker (default: 256)'
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=pool_size(),
+        help=(
+            'scrypt: hashes running at once per app worker, i.e. its hashing pool size '
+            '(default: HASH_POOL_WORKERS, else CPU count / WEB_CONCURRENCY, at most 2)'
+        )
+    )
+    parser.add_argument('--scrypt-r', type=int, default=8, help='scrypt block size')
+    parser.add_argument('--scrypt-p', type=int, default=1, help='scrypt parallelization')
+    parser.add_argument('--samples', type=int, default=5, help='Timed hashes per measurement')
+    parser.add_argument(
+        '--output',
+        default=os.getenv('HASH_CALIBRATION_FILE') or 'hash_calibration.json',
+        help='Calibration file to write (default: HASH_CALIBRATION_FILE)'
+    )
+    parser.add_argument('--dry-run', action='store_true', help='Print without writing')
+    args = parser.parse_args(argv)
+    
+    if args.target_ms <= 0 or args.samples <= 0 or args.concurrency <= 0:
+        parser.error('--target-ms, --samples and --concurrency must be positive')
+    
+    if args.method == 'scrypt':
+        result = calibrate_scrypt(
+            args.target_ms,
+            args.memory_budget_mb,
+            args.concurrency,
+            r=args.scrypt_r,
+            p=args.scrypt_p,
+            samples=args.samples
+        )
+        if not result['fits_budget']:
+            print(
+                "warning: no scrypt N meets the target and memory budget, "
+                "using the smallest benchmarked N",
+                file=sys.stderr
+            )
+    else:
+        result = calibrate_pbkdf2(args.target_ms, args.samples)
+        if result['target_below_minimum']:
+            print(
+                f"warning: the minimum of {MIN_PBKDF2_ITERATIONS} iterations takes "
+                f"{result['measured_ms']} ms per hash, over the {args.target_ms} ms target; "
+                "keeping the minimum. Plan for "
+                f"{result['hashes_per_second_per_node']} hashes/s per node "
+                "(add cores or workers) rather than a weaker work factor",
+                file=sys.stderr
+            )
+    
+    print(json.dumps(result, indent=2))
+    if not args.dry_run:
+        with open(args.output, 'w', encoding='utf-8') as calibration_file:
+            json.dump(result, calibration_file, indent=2)
+        print(f"Wrote {args.output}; set HASH_CALIBRATION_FILE={args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,9 +4,71 @@ Configuration management.
 Loads configuration from environment variables with sensible defaults.
 """
 
+import json
+import logging
 import os
 from typing import Dict, Any
 
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS
+
+
+logger = logging.getLogger(__name__)
+
+# PBKDF2-SHA256 work factor floor (Werkzeug's default); neither calibration
+# nor PASSWORD_HASH_ITERATIONS may weaken new hashes below it
+MIN_PBKDF2_ITERATIONS = DEFAULT_PBKDF2_ITERATIONS
+
+
+def _load_hash_calibration() -> Dict[str, Any]:
+    """
+    Load the hashing calibration file named by HASH_CALIBRATION_FILE.
+    
+    The file is written by ``python -m app_latest.calibrate``.
+    
+    Returns:
+        Calibration values, or an empty dict if unset or unreadable.
+    """
+    path = os.getenv('HASH_CALIBRATION_FILE')
+    if not path:
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as calibration_file:
+            calibration = json.load(calibration_file)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring hash calibration file {path}: {e}")
+        return {}
+    return calibration if isinstance(calibration, dict) else {}
+
+
+def _pbkdf2_iterations(calibration: Dict[str, Any]) -> int:
+    """
+    Get the PBKDF2 iteration policy (env, else calibration file, else floor).
+    
+    Args:
+        calibration: Values from the hashing calibration file.
+        
+    Returns:
+        Iteration count for new hashes.
+        
+    Raises:
+        ValueError: If the configured count is below ``MIN_PBKDF2_ITERATIONS``.
+    """
+    if os.getenv('PASSWORD_HASH_ITERATIONS'):
+        source = 'PASSWORD_HASH_ITERATIONS'
+        iterations = int(os.environ['PASSWORD_HASH_ITERATIONS'])
+    elif 'pbkdf2_iterations' in calibration:
+        source = f"HASH_CALIBRATION_FILE {os.getenv('HASH_CALIBRATION_FILE')}"
+        iterations = int(calibration['pbkdf2_iterations'])
+    else:
+        return MIN_PBKDF2_ITERATIONS
+    
+    if iterations < MIN_PBKDF2_ITERATIONS:
+        raise ValueError(
+            f"{source} sets {iterations} PBKDF2 iterations, "
+            f"below the minimum of {MIN_PBKDF2_ITERATIONS}"
+        )
+    return iterations
+
 
 def get_config() -> Dict[str, Any]:
     """
@@ -15,10 +77,90 @@ def get_config() -> Dict[str, Any]:
     Returns:
         Dictionary with configuration values.
     """
+    calibration = _load_hash_calibration()
+    database_path = os.getenv('DATABASE_PATH', 'secure_app.db')
     return {
-        'DATABASE_PATH': os.getenv('DATABASE_PATH', 'secure_app.db'),
+        'DATABASE_PATH': database_path,
         'DEBUG': os.getenv('DEBUG', 'False').lower() == 'true',
         'MAX_NAME_LENGTH': int(os.getenv('MAX_NAME_LENGTH', '255')),
+        'MIN_PASSWORD_LENGTH': int(os.getenv('MIN_PASSWORD_LENGTH', '8')),
+        # Password hashing policy (env, else calibration file, else default);
+        # hashes weaker than the policy are upgraded on login
+        'PASSWORD_HASH_METHOD': os.getenv(
+            'PASSWORD_HASH_METHOD',
+            calibration.get('method', 'pbkdf2').split(':')[0]
+        ).lower(),
+        'PASSWORD_HASH_ITERATIONS': _pbkdf2_iterations(calibration),
+        'SCRYPT_N': int(os.getenv('SCRYPT_N', calibration.get('scrypt_n', 32768))),
+        'SCRYPT_R': int(os.getenv('SCRYPT_R', calibration.get('scrypt_r', 8))),
+        'SCRYPT_P': int(os.getenv('SCRYPT_P', calibration.get('scrypt_p', 1))),
+        'MAX_BATCH_IDS': int(os.getenv('MAX_BATCH_IDS', '1000')),
+        'MAX_PAGE_SIZE': int(os.getenv('MAX_PAGE_SIZE', '100')),
+        'EXPORT_CHUNK_SIZE': int(os.getenv('EXPORT_CHUNK_SIZE', '1000')),
+        'MAX_BATCH_SIZE': int(os.getenv('MAX_BATCH_SIZE', '1000')),
+        'MAX_BATCH_BODY_SIZE': int(os.getenv('MAX_BATCH_BODY_SIZE', '1048576')),
+        'USER_NAME_NOCASE': os.getenv('USER_NAME_NOCASE', 'False').lower() == 'true',
         'INIT_DB_ON_START': os.getenv('INIT_DB_ON_START', 'True').lower() == 'true',
         'LOG_LEVEL': os.getenv('LOG_LEVEL', 'INFO'),
+        'DB_POOL_MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', '5')),
+        'DB_POOL_IDLE_TIMEOUT': float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300')),
+        'DB_POOL_ACQUIRE_TIMEOUT': float(os.getenv('DB_POOL_ACQUIRE_TIMEOUT', '5')),
+        # PRAGMA profile: "durable" or "fast" preset, individual overrides win
+        'DB_PRAGMA_PROFILE': os.getenv('DB_PRAGMA_PROFILE', 'durable').lower(),
+        'DB_JOURNAL_MODE': os.getenv('DB_JOURNAL_MODE'),
+        'DB_SYNCHRONOUS': os.getenv('DB_SYNCHRONOUS'),
+        'DB_CACHE_SIZE': os.getenv('DB_CACHE_SIZE'),
+        'DB_MMAP_SIZE': os.getenv('DB_MMAP_SIZE'),
+        'DB_TEMP_STORE': os.getenv('DB_TEMP_STORE'),
+        'DB_BUSY_TIMEOUT': os.getenv('DB_BUSY_TIMEOUT'),
+        # Group commit: one writer thread per worker batches add_user inserts
+        'WRITE_QUEUE_ENABLED': os.getenv('WRITE_QUEUE_ENABLED', 'False').lower() == 'true',
+        'WRITE_QUEUE_MAX_BATCH': int(os.getenv('WRITE_QUEUE_MAX_BATCH', '64')),
+        'WRITE_QUEUE_MAX_DELAY_MS': float(os.getenv('WRITE_QUEUE_MAX_DELAY_MS', '2')),
+        'WRITE_QUEUE_TIMEOUT': float(os.getenv('WRITE_QUEUE_TIMEOUT', '10')),
+        # Password hashing pool: workers 0 = CPU count / WEB_CONCURRENCY (1-2),
+        # queue 0 = 2 x workers
+        'HASH_POOL_ENABLED': os.getenv('HASH_POOL_ENABLED', 'True').lower() == 'true',
+        'HASH_POOL_WORKERS': int(os.getenv('HASH_POOL_WORKERS', '0')),
+        'HASH_POOL_QUEUE_SIZE': int(os.getenv('HASH_POOL_QUEUE_SIZE', '0')),
+        'HASH_POOL_TIMEOUT': float(os.getenv('HASH_POOL_TIMEOUT', '5')),
+        # Read-through user cache: size 0 disables, TTL 0 means no expiry
+        'USER_CACHE_SIZE': int(os.getenv('USER_CACHE_SIZE', '10000')),
+        'USER_CACHE_TTL': float(os.getenv('USER_CACHE_TTL', '0')),
+        # Cache of not-found user IDs; keep the TTL short across workers
+        'NEGATIVE_CACHE_SIZE': int(os.getenv('NEGATIVE_CACHE_SIZE', '10000')),
+        'NEGATIVE_CACHE_TTL': float(os.getenv('NEGATIVE_CACHE_TTL', '5')),
+        # Shared active_users table: row limit and per-worker write coalescing
+        'ACTIVE_USERS_CAPACITY': int(os.getenv('ACTIVE_USERS_CAPACITY', '10000')),
+        'ACTIVE_USERS_FLUSH_INTERVAL': float(os.getenv('ACTIVE_USERS_FLUSH_INTERVAL', '1')),
+        # Sliding windows (seconds) for distinct active user counts
+        'ACTIVE_USERS_WINDOWS': sorted({
+            int(window) for window in os.getenv('ACTIVE_USERS_WINDOWS', '60,300,900').split(',')
+            if window.strip()
+        }),
+        'ACTIVE_USERS_BUCKET_SECONDS': int(os.getenv('ACTIVE_USERS_BUCKET_SECONDS', '10')),
+        # HyperLogLog distinct active users per hour/day (precision 13 ~ 1.15%, 8 KiB)
+        'ACTIVITY_SKETCH_PRECISION': int(os.getenv('ACTIVITY_SKETCH_PRECISION', '13')),
+        'ACTIVITY_SKETCH_RETENTION_DAYS': int(os.getenv('ACTIVITY_SKETCH_RETENTION_DAYS', '30')),
+        # Hot user IDs of GET /users/<id>: Count-Min sketch + top-K, decayed
+        'HOT_USERS_TOP_K': int(os.getenv('HOT_USERS_TOP_K', '100')),
+        'HOT_USERS_SKETCH_WIDTH': int(os.getenv('HOT_USERS_SKETCH_WIDTH', '2048')),
+        'HOT_USERS_SKETCH_DEPTH': int(os.getenv('HOT_USERS_SKETCH_DEPTH', '4')),
+        'HOT_USERS_DECAY_INTERVAL': float(os.getenv('HOT_USERS_DECAY_INTERVAL', '60')),
+        'HOT_USERS_DECAY_FACTOR': float(os.getenv('HOT_USERS_DECAY_FACTOR', '0.5')),
+        # SQL statement timing and slow-query log (app_latest.sql_timing)
+        'SQL_TIMING_ENABLED': os.getenv('SQL_TIMING_ENABLED', 'False').lower() == 'true',
+        'SQL_SLOW_QUERY_MS': float(os.getenv('SQL_SLOW_QUERY_MS', '100')),
+        'SQL_WARN_ON_SCAN': os.getenv('SQL_WARN_ON_SCAN', 'True').lower() == 'true',
+        # Request latency histograms; METRICS_DIR aggregates across workers
+        'METRICS_ENABLED': os.getenv('METRICS_ENABLED', 'True').lower() == 'true',
+        'METRICS_DIR': os.getenv('METRICS_DIR', ''),
+        'METRICS_WRITE_INTERVAL': float(os.getenv('METRICS_WRITE_INTERVAL', '5')),
+        # Longest run of the /admin/profile sampling profiler; PROFILER_DIR is
+        # private to the service user and shared by its workers, so any of
+        # them can return another's result
+        'PROFILER_MAX_SECONDS': float(os.getenv('PROFILER_MAX_SECONDS', '25')),
+        'PROFILER_DIR': os.getenv('PROFILER_DIR') or f"{database_path}.profiles",
+        # Bearer token for /admin endpoints; empty disables them
+        'ADMIN_TOKEN': os.getenv('ADMIN_TOKEN', ''),
     }
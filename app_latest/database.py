@@ -1,76 +1,543 @@
 """
 Database connection management and initialization.
 
-Provides thread-safe database connection context manager.
+Provides thread-safe database connection context manager backed by
+a bounded per-process connection pool.
 """
 
+import atexit
+import os
 import sqlite3
 import logging
+import threading
+import time
+from collections import deque
 from contextlib import contextmanager
-from typing import Generator, Optional
+from typing import Any, Deque, Dict, Generator, Optional, Tuple
+
+from app_latest.config import get_config
+from app_latest.sql_timing import TimedConnection
 
 
 logger = logging.getLogger(__name__)
 
+# PRAGMA presets applied once to every new physical connection.
+# Both use WAL so readers never block on the writer; "durable" keeps
+# a full fsync per commit, "fast" trades the last transactions on power
+# loss for fewer fsyncs, a larger page cache and memory-mapped reads.
+PRAGMA_PRESETS: Dict[str, Dict[str, Any]] = {
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -16000,  # Negative value is KiB: ~16 MB
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000,
+    },
+    'fast': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,
+        'mmap_size': 268435456,  # 256 MB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+}
+
+# PRAGMA values cannot be bound as parameters, so every value is
+# checked against an allow-list (or coerced to int) before use
+_PRAGMA_CHOICES: Dict[str, Tuple[str, ...]] = {
+    'journal_mode': ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'),
+    'synchronous': ('OFF', 'NORMAL', 'FULL', 'EXTRA'),
+    'temp_store': ('DEFAULT', 'FILE', 'MEMORY'),
+}
+_INTEGER_PRAGMAS = ('cache_size', 'mmap_size', 'busy_timeout')
+
+# Unique indexes on users.name; only one of them exists at a time
+USER_NAME_INDEX = 'idx_users_name'
+USER_NAME_INDEX_NOCASE = 'idx_users_name_nocase'
+
+
+def pragma_statement(name: str, value: Any) -> str:
+    """
+    Build a validated PRAGMA assignment statement.
+    
+    Args:
+        name: PRAGMA name (one of the tunable PRAGMAs).
+        value: Value to assign.
+        
+    Returns:
+        PRAGMA statement safe to execute.
+        
+    Raises:
+        ValueError: If the PRAGMA or its value is not allowed.
+    """
+    if name in _PRAGMA_CHOICES:
+        normalized = str(value).strip().upper()
+        if normalized not in _PRAGMA_CHOICES[name]:
+            raise ValueError(f"Invalid value for PRAGMA {name}: {value!r}")
+        return f"PRAGMA {name} = {normalized}"
+    
+    if name in _INTEGER_PRAGMAS:
+        try:
+            return f"PRAGMA {name} = {int(value)}"
+        except (TypeError, ValueError):
+            raise ValueError(f"PRAGMA {name} requires an integer, got {value!r}")
+    
+    raise ValueError(f"Unsupported PRAGMA: {name}")
+
+
+def resolve_pragmas(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Resolve the PRAGMA profile from configuration.
+    
+    Starts from the ``DB_PRAGMA_PROFILE`` preset and applies any
+    individual ``DB_<PRAGMA>`` overrides.
+    
+    Args:
+        config: Application configuration from ``get_config``.
+        
+    Returns:
+        Dictionary mapping PRAGMA name to value.
+        
+    Raises:
+        ValueError: If the profile name or an override is invalid.
+    """
+    profile = config['DB_PRAGMA_PROFILE']
+    if profile not in PRAGMA_PRESETS:
+        raise ValueError(
+            f"Unknown DB_PRAGMA_PROFILE {profile!r}, "
+            f"expected one of: {', '.join(PRAGMA_PRESETS)}"
+        )
+    
+    pragmas = dict(PRAGMA_PRESETS[profile])
+    for name in pragmas:
+        override = config.get(f"DB_{name.upper()}")
+        if override is not None:
+            pragmas[name] = override
+    
+    # Validate eagerly so misconfiguration fails at startup
+    for name, value in pragmas.items():
+        pragma_statement(name, value)
+    return pragmas
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of SQLite connections for one database file.
+    
+    Idle connections are reused most-recently-used first, closed once they
+    have been idle longer than ``idle_timeout`` and validated on checkout.
+    When all ``max_size`` connections are checked out, callers wait up to
+    ``acquire_timeout`` seconds for one to be released. ``pragmas`` are
+    applied once to each physical connection when it is opened. With
+    ``slow_query_ms`` set, connections time their statements (see
+    ``app_latest.sql_timing``).
+    """
+    
+    def __init__(
+        self,
+        database_path: str,
+        max_size: int = 5,
+        idle_timeout: float = 300.0,
+        acquire_timeout: float = 5.0,
+        pragmas: Optional[Dict[str, Any]] = None,
+        slow_query_ms: Optional[float] = None,
+        warn_on_scan: bool = False
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("Pool max_size must be at least 1")
+        
+        self.database_path = database_path
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self.pragmas = dict(pragmas or {})
+        self.slow_query_ms = slow_query_ms
+        self.warn_on_scan = warn_on_scan
+        
+        self._idle: Deque[Tuple[sqlite3.Connection, float]] = deque()
+        self._size = 0  # Open connections, idle and checked out
+        self._closed = False
+        self._cond = threading.Condition(threading.Lock())
+        self._stats: Dict[str, int] = {
+            'created': 0,
+            'reused': 0,
+            'closed': 0,
+            'expired': 0,
+            'failed_validation': 0,
+            'waits': 0,
+            'timeouts': 0,
+        }
+    
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open a new physical connection.
+        
+        Returns:
+            New SQLite connection with the PRAGMA profile applied.
+        """
+        if self.slow_query_ms is None:
+            conn = sqlite3.connect(self.database_path, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(
+                self.database_path,
+                check_same_thread=False,
+                factory=TimedConnection
+            )
+            conn.slow_query_seconds = self.slow_query_ms / 1000.0
+            conn.warn_on_scan = self.warn_on_scan
+        conn.row_factory = sqlite3.Row
+        try:
+            for name, value in self.pragmas.items():
+                row = conn.execute(pragma_statement(name, value)).fetchone()
+                if name == 'journal_mode' and row and str(row[0]).upper() != str(value).upper():
+                    logger.warning(
+                        f"journal_mode {value} not applied to {self.database_path}, "
+                        f"using {row[0]}"
+                    )
+        except sqlite3.Error:
+            conn.close()
+            raise
+        return conn
+    
+    @staticmethod
+    def _is_healthy(conn: sqlite3.Connection) -> bool:
+        """
+        Check that a pooled connection is still usable.
+        
+        Args:
+            conn: Connection to validate.
+            
+        Returns:
+            True if the connection answers a trivial query.
+        """
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def _close_quietly(self, conn: sqlite3.Connection) -> None:
+        """Close a connection, ignoring errors from an already broken one."""
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Error closing pooled connection: {e}")
+    
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Check out a connection, reusing an idle one when possible.
+        
+        Returns:
+            SQLite connection owned by the caller until released.
+            
+        Raises:
+            sqlite3.OperationalError: If the pool is closed or no connection
+                became available within ``acquire_timeout`` seconds.
+            sqlite3.Error: If a new connection cannot be opened.
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+        
+        while True:
+            conn: Optional[sqlite3.Connection] = None
+            expired = []
+            
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise sqlite3.OperationalError("Connection pool is closed")
+                    
+                    now = time.monotonic()
+                    # Oldest idle connections sit at the left end
+                    while self._idle and now - self._idle[0][1] > self.idle_timeout:
+                        expired.append(self._idle.popleft()[0])
+                        self._size -= 1
+                        self._stats['expired'] += 1
+                    
+                    if self._idle:
+                        conn = self._idle.pop()[0]
+                        break
+                    
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise sqlite3.OperationalError(
+                            "Timed out waiting for a database connection"
+                        )
+                    self._stats['waits'] += 1
+                    self._cond.wait(remaining)
+            
+            for stale in expired:
+                self._close_quietly(stale)
+            
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats['created'] += 1
+                return conn
+            
+            if self._is_healthy(conn):
+                with self._cond:
+                    self._stats['reused'] += 1
+                return conn
+            
+            logger.warning(f"Discarding unhealthy pooled connection to {self.database_path}")
+            self._close_quietly(conn)
+            with self._cond:
+                self._size -= 1
+                self._stats['failed_validation'] += 1
+                self._stats['closed'] += 1
+    
+    def release(self, conn: sqlite3.Connection, discard: bool = False) -> None:
+        """
+        Return a connection to the pool.
+        
+        Args:
+            conn: Connection previously obtained from ``acquire``.
+            discard: Close the connection instead of keeping it idle.
+        """
+        if not discard and conn.in_transaction:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                discard = True
+        
+        with self._cond:
+            if discard or self._closed:
+                self._size -= 1
+                self._stats['closed'] += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            self._cond.notify()
+        
+        if conn is not None:
+            self._close_quietly(conn)
+    
+    def close(self) -> None:
+        """Close all idle connections and refuse further checkouts."""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._stats['closed'] += len(idle)
+            self._cond.notify_all()
+        
+        for conn in idle:
+            self._close_quietly(conn)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool statistics.
+        
+        Returns:
+            Dictionary with pool sizing and lifetime counters.
+        """
+        with self._cond:
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                **self._stats,
+            }
+
+
+# Pools are per worker process: connections must never cross a fork
+_pools: Dict[str, ConnectionPool] = {}
+_pools_pid: Optional[int] = None
+_pools_lock = threading.Lock()
+
+
+def _get_pool(database_path: str) -> ConnectionPool:
+    """
+    Get (or lazily create) the connection pool for a database file.
+    
+    Args:
+        database_path: Path to SQLite database file.
+        
+    Returns:
+        Connection pool owned by the current process.
+    """
+    global _pools_pid
+    
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            # Inherited from the parent process: drop without closing
+            _pools.clear()
+            _pools_pid = os.getpid()
+        
+        pool = _pools.get(database_path)
+        if pool is None:
+            config = get_config()
+            pool = ConnectionPool(
+                database_path,
+                max_size=config['DB_POOL_MAX_SIZE'],
+                idle_timeout=config['DB_POOL_IDLE_TIMEOUT'],
+                acquire_timeout=config['DB_POOL_ACQUIRE_TIMEOUT'],
+                pragmas=resolve_pragmas(config),
+                slow_query_ms=config['SQL_SLOW_QUERY_MS'] if config['SQL_TIMING_ENABLED'] else None,
+                warn_on_scan=config['SQL_WARN_ON_SCAN']
+            )
+            _pools[database_path] = pool
+        return pool
+
+
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get statistics for every connection pool in this process.
+    
+    Returns:
+        Dictionary mapping database path to pool statistics.
+    """
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            return {}
+        pools = dict(_pools)
+    return {path: pool.stats() for path, pool in pools.items()}
+
+
+def close_all_pools() -> None:
+    """Close every connection pool in this process."""
+    with _pools_lock:
+        pools = list(_pools.values()) if _pools_pid == os.getpid() else []
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+# Registered before any module that writes through the pools, so it runs last
+atexit.register(close_all_pools)
+
 
 @contextmanager
-def get_db_connection(database_path: str) -> Generator[sqlite3.Connection, None, None]:
+def get_db_connection(
+    database_path: str,
+    pragmas: Optional[Dict[str, Any]] = None
+) -> Generator[sqlite3.Connection, None, None]:
     """
     Thread-safe database connection context manager.
     
+    Checks a connection out of the per-process pool and returns it
+    when the block exits.
+    
     Args:
         database_path: Path to SQLite database file.
+        pragmas: PRAGMA overrides for this checkout only (e.g.
+            ``{'synchronous': 'OFF'}`` for bulk loads); the profile
+            values are restored before the connection is pooled again.
+            ``journal_mode`` is database-wide and cannot be overridden.
     
     Yields:
         SQLite database connection.
         
     Raises:
         sqlite3.Error: If database operation fails.
+        ValueError: If a PRAGMA override is invalid.
     """
-    conn: Optional[sqlite3.Connection] = None
+    overrides = dict(pragmas or {})
+    if 'journal_mode' in overrides:
+        raise ValueError("journal_mode cannot be overridden per connection")
+    statements = [pragma_statement(name, value) for name, value in overrides.items()]
+    
+    pool = _get_pool(database_path)
+    conn = pool.acquire()
+    discard = False
     try:
-        conn = sqlite3.connect(database_path, check_same_thread=False)
-        conn.row_factory = sqlite3.Row
+        for statement in statements:
+            conn.execute(statement)
         yield conn
         conn.commit()
     except sqlite3.Error as e:
-        if conn:
-            conn.rollback()
+        discard = not _rollback(conn)
         logger.error(f"Database error: {e}", exc_info=True)
         raise
     except Exception as e:
-        if conn:
-            conn.rollback()
+        discard = not _rollback(conn)
         logger.error(f"Unexpected database error: {e}", exc_info=True)
         raise
     finally:
-        if conn:
-            conn.close()
+        if overrides and not discard:
+            discard = not _restore_pragmas(conn, pool, overrides)
+        pool.release(conn, discard=discard)
+
+
+def _restore_pragmas(
+    conn: sqlite3.Connection,
+    pool: ConnectionPool,
+    overrides: Dict[str, Any]
+) -> bool:
+    """
+    Reset overridden PRAGMAs to the pool's profile values.
+    
+    Args:
+        conn: Connection the overrides were applied to.
+        pool: Pool the connection belongs to.
+        overrides: PRAGMAs that were overridden.
+        
+    Returns:
+        True if the connection is back on its profile and can be reused.
+    """
+    try:
+        for name in overrides:
+            if name not in pool.pragmas:
+                return False  # No profile value to go back to
+            conn.execute(pragma_statement(name, pool.pragmas[name]))
+        return True
+    except sqlite3.Error as e:
+        logger.warning(f"Failed to restore PRAGMAs, discarding connection: {e}")
+        return False
+
+
+def _rollback(conn: sqlite3.Connection) -> bool:
+    """
+    Roll back the current transaction.
+    
+    Args:
+        conn: Connection to roll back.
+        
+    Returns:
+        True if the rollback succeeded and the connection can be reused.
+    """
+    try:
+        conn.rollback()
+        return True
+    except sqlite3.Error as e:
+        logger.warning(f"Rollback failed, discarding connection: {e}")
+        return False
 
 
 def init_db(database_path: str) -> None:
     """
     Initialize database schema.
     
-    Creates users table if it doesn't exist.
-    Should be called once before starting the application,
-    not in each worker process.
+    Applies pending schema migrations (see ``app_latest.migrations``).
+    Should be called once before starting the application, e.g. via
+    ``python -m app_latest.migrations``; when the schema is already
+    current this is a read-only version check.
     
     Args:
         database_path: Path to SQLite database file.
     """
+    from app_latest.migrations import migrate
+    
     try:
-        with get_db_connection(database_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    password_hash TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            logger.info(f"Database initialized at {database_path}")
+        migrate(database_path)
+        logger.info(f"Database initialized at {database_path}")
     except sqlite3.Error as e:
         logger.error(f"Failed to initialize database: {e}", exc_info=True)
         raise
-
@@ -0,0 +1,330 @@
+"""
+Process pool for CPU-heavy password hashing.
+
+Password hashing work submitted here runs in a per-process pool of
+worker processes, so a burst of logins or registrations cannot
+monopolise the request-serving worker. Every Gunicorn worker owns a
+pool, so by default each gets its share of the cores (CPU count divided
+by ``WEB_CONCURRENCY``), at most two processes. The number
+of outstanding tasks is bounded; when the pool is disabled or cannot
+be used, work runs synchronously in the calling thread instead.
+
+Offline bulk jobs use ``map_hash_chunks``, which starts its own pool
+sized to the CPU count for the duration of the job and streams chunks of
+work through it with a bounded number of chunks in flight.
+
+Pool processes are started with "spawn", which re-imports the parent's
+``__main__`` script as ``__mp_main__`` in every child; entry points must
+keep application setup out of that import (see ``main-latest.py``).
+"""
+
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from app_latest.config import get_config
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+A = TypeVar('A')
+
+
+class HashingUnavailableError(RuntimeError):
+    """Raised when hashing work cannot be accepted or finished in time."""
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_slots: Optional[threading.BoundedSemaphore] = None
+_settings: Dict[str, Any] = {}
+_executor_lock = threading.Lock()
+
+
+def _default_workers() -> int:
+    """
+    Get the default pool size: this worker's share of the cores, 1 to 2.
+    
+    Returns:
+        Number of hashing processes.
+    """
+    try:
+        web_workers = max(1, int(os.getenv('WEB_CONCURRENCY', '1')))
+    except ValueError:
+        web_workers = 1
+    return max(1, min(2, (os.cpu_count() or 1) // web_workers))
+
+
+def pool_size(config: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Get the request-path pool size: ``HASH_POOL_WORKERS``, else the default.
+    
+    Args:
+        config: Application configuration (defaults to ``get_config()``).
+        
+    Returns:
+        Number of hashing processes per web worker.
+    """
+    if config is None:
+        config = get_config()
+    return config['HASH_POOL_WORKERS'] or _default_workers()
+
+
+def _get_executor() -> Optional[ProcessPoolExecutor]:
+    """
+    Get (or lazily start) the hashing pool for this process.
+    
+    Returns:
+        Process pool, or None if hashing should run synchronously.
+    """
+    global _executor, _executor_pid, _slots
+    
+    with _executor_lock:
+        if _executor_pid != os.getpid():
+            # Never reuse a pool inherited across fork
+            _executor = None
+            _executor_pid = os.getpid()
+            config = get_config()
+            workers = pool_size(config)
+            _settings.update({
+                'enabled': config['HASH_POOL_ENABLED'],
+                'workers': workers,
+                'queue_size': config['HASH_POOL_QUEUE_SIZE'] or workers * 2,
+                'timeout': config['HASH_POOL_TIMEOUT'],
+            })
+            _slots = threading.BoundedSemaphore(_settings['queue_size'])
+        
+        if not _settings['enabled']:
+            return None
+        
+        if _executor is None:
+            try:
+                # "spawn" avoids forking a multi-threaded request worker
+                _executor = ProcessPoolExecutor(
+                    max_workers=_settings['workers'],
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            except (OSError, NotImplementedError) as e:
+                logger.warning(f"Hashing pool unavailable, hashing synchronously: {e}")
+                _settings['enabled'] = False
+                return None
+        return _executor
+
+
+def _reset_executor(broken: ProcessPoolExecutor) -> None:
+    """
+    Drop a broken pool so the next task starts a fresh one.
+    
+    Args:
+        broken: Pool that raised ``BrokenProcessPool``.
+    """
+    global _executor
+    
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def run_hash_task(fn: Callable[..., T], *args: Any) -> T:
+    """
+    Run a hashing function in the pool and wait for its result.
+    
+    Args:
+        fn: Picklable module-level function.
+        *args: Arguments for ``fn``.
+        
+    Returns:
+        Return value of ``fn``.
+        
+    Raises:
+        HashingUnavailableError: If the queue stays full or the task does
+            not finish within ``HASH_POOL_TIMEOUT`` seconds.
+    """
+    executor = _get_executor()
+    if executor is None:
+        return fn(*args)
+    
+    timeout = _settings['timeout']
+    slots = _slots
+    if not slots.acquire(timeout=timeout):
+        raise HashingUnavailableError("Password hashing queue is full")
+    
+    try:
+        future: 'Future[T]' = executor.submit(fn, *args)
+    except (BrokenProcessPool, RuntimeError) as e:
+        slots.release()
+        logger.warning(f"Hashing pool failed, hashing synchronously: {e}")
+        _reset_executor(executor)
+        return fn(*args)
+    
+    # Free the slot only when the task really finishes, even after a timeout
+    future.add_done_callback(lambda _: slots.release())
+    
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise HashingUnavailableError("Password hashing timed out")
+    except BrokenProcessPool as e:
+        logger.warning(f"Hashing pool broke, hashing synchronously: {e}")
+        _reset_executor(executor)
+        return fn(*args)
+
+
+def map_hash_chunks(
+    fn: Callable[[List[A]], List[T]],
+    items: Iterable[A],
+    chunk_size: int,
+    workers: Optional[int] = None
+) -> Iterator[T]:
+    """
+    Apply a chunk function across all cores, yielding results in input order.
+    
+    Intended for offline jobs, so it runs on a dedicated pool of
+    ``workers`` processes started for this call and shut down when the
+    iterator is exhausted or closed. The request-path pool, its
+    per-web-worker size cap and ``HASH_POOL_ENABLED`` do not apply, and
+    neither do queue slots or ``HASH_POOL_TIMEOUT``.
+    
+    Items are grouped into chunks of ``chunk_size`` so each task amortises
+    its pickling overhead, and at most two chunks per worker are in flight,
+    so arbitrarily large iterables are consumed lazily.
+    
+    Args:
+        fn: Picklable module-level function mapping a list of items to a
+            list of results of the same length.
+        items: Items to process.
+        chunk_size: Items per submitted task.
+        workers: Pool processes (default: CPU count); 1 runs in-process.
+        
+    Yields:
+        One result per item, in the order of ``items``.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    workers = workers if workers is not None else os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    
+    iterator = iter(items)
+    chunks = iter(lambda: list(islice(iterator, chunk_size)), [])
+    
+    executor = _start_bulk_executor(workers) if workers > 1 else None
+    if executor is None:
+        for chunk in chunks:
+            yield from fn(chunk)
+        return
+    
+    max_in_flight = workers * 2
+    pending: Deque[Tuple[List[A], Optional['Future[List[T]]']]] = deque()
+    broken = False
+    
+    try:
+        for chunk in chunks:
+            if broken:
+                pending.append((chunk, None))
+            else:
+                try:
+                    pending.append((chunk, executor.submit(fn, chunk)))
+                except (BrokenProcessPool, RuntimeError) as e:
+                    logger.warning(f"Bulk hashing pool failed, hashing synchronously: {e}")
+                    broken = True
+                    pending.append((chunk, None))
+            
+            while pending and (broken or len(pending) >= max_in_flight):
+                results, broken = _chunk_result(pending.popleft(), fn, broken)
+                yield from results
+        
+        while pending:
+            results, broken = _chunk_result(pending.popleft(), fn, broken)
+            yield from results
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _start_bulk_executor(workers: int) -> Optional[ProcessPoolExecutor]:
+    """
+    Start a dedicated pool for one bulk job.
+    
+    Args:
+        workers: Pool processes.
+        
+    Returns:
+        Process pool, or None if the job should run synchronously.
+    """
+    try:
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    except (OSError, NotImplementedError) as e:
+        logger.warning(f"Bulk hashing pool unavailable, hashing synchronously: {e}")
+        return None
+
+
+def _chunk_result(
+    entry: Tuple[List[A], Optional['Future[List[T]]']],
+    fn: Callable[[List[A]], List[T]],
+    broken: bool
+) -> Tuple[List[T], bool]:
+    """
+    Wait for one chunk, recomputing it in-process if the pool broke.
+    
+    Args:
+        entry: Chunk and its future (None if it was never submitted).
+        fn: Chunk function.
+        broken: Whether the pool is already known to be broken.
+        
+    Returns:
+        Tuple of (chunk results, whether the pool is broken).
+    """
+    chunk, future = entry
+    if future is not None and not broken:
+        try:
+            return future.result(), False
+        except BrokenProcessPool as e:
+            logger.warning(f"Bulk hashing pool broke, hashing synchronously: {e}")
+    return fn(chunk), True
+
+
+def get_executor_stats() -> Dict[str, Any]:
+    """
+    Get hashing pool settings for this process.
+    
+    Returns:
+        Dictionary with pool settings and whether the pool is running.
+    """
+    with _executor_lock:
+        if _executor_pid != os.getpid():
+            return {'running': False}
+        return {'running': _executor is not None, **_settings}
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    """
+    Stop the hashing pool of this process.
+    
+    Args:
+        wait: Wait for running tasks to finish.
+    """
+    global _executor
+    
+    with _executor_lock:
+        executor = _executor if _executor_pid == os.getpid() else None
+        _executor = None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+# Stop the pool processes when a worker exits normally
+atexit.register(shutdown_executor)
@@ -0,0 +1,219 @@
+"""
+Bulk user import command-line tool.
+
+Streams an NDJSON or CSV file of users, validates each row with the same
+rules as ``POST /users`` and inserts valid rows through
+``app_latest.services.add_users`` in large transactions.
+
+Usage:
+    python -m app_latest.importer users.ndjson [--batch-size 5000]
+        [--synchronous OFF] [--rejects rejected.ndjson]
+
+NDJSON lines are objects with a ``name`` field; CSV files need a header
+row with a ``name`` column.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from app_latest.config import get_config
+from app_latest.migrations import migrate
+from app_latest.routes import validate_name
+from app_latest.services import add_users
+
+
+logger = logging.getLogger(__name__)
+
+
+def read_rows(stream: TextIO, file_format: str) -> Iterator[Tuple[int, str, Any]]:
+    """
+    Stream raw user names from an input file.
+    
+    Args:
+        stream: Open text stream.
+        file_format: ``ndjson`` or ``csv``.
+        
+    Yields:
+        Tuple of (line number, raw line, name or None if unparseable).
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        if not reader.fieldnames or 'name' not in reader.fieldnames:
+            raise ValueError("CSV input needs a header row with a 'name' column")
+        for row in reader:
+            raw = ','.join(row.get(key) or '' for key in reader.fieldnames)
+            yield reader.line_num, raw, row.get('name')
+        return
+    
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            yield line_number, line, None
+            continue
+        yield line_number, line, record.get('name') if isinstance(record, dict) else None
+
+
+def import_users(
+    stream: TextIO,
+    database_path: str,
+    file_format: str = 'ndjson',
+    batch_size: int = 5000,
+    max_name_length: int = 255,
+    pragmas: Optional[Dict[str, Any]] = None,
+    rejects: Optional[TextIO] = None
+) -> Dict[str, Any]:
+    """
+    Import users from a stream in batched transactions.
+    
+    Args:
+        stream: Open text stream with NDJSON or CSV rows.
+        database_path: Path to database file.
+        file_format: ``ndjson`` or ``csv``.
+        batch_size: Rows inserted per transaction.
+        max_name_length: Maximum allowed name length.
+        pragmas: PRAGMA overrides applied while loading.
+        rejects: Optional stream receiving one JSON line per rejected row.
+        
+    Returns:
+        Dictionary with read/imported/rejected counts, elapsed seconds
+        and rows per second.
+    """
+    started = time.monotonic()
+    totals = {'read': 0, 'imported': 0, 'rejected': 0}
+    batch: List[Tuple[int, str, str]] = []
+    
+    def reject(line_number: int, line: str, reason: str) -> None:
+        totals['rejected'] += 1
+        if rejects is not None:
+            rejects.write(json.dumps(
+                {"line": line_number, "error": reason, "input": line[:1000]},
+                ensure_ascii=False
+            ) + '\n')
+    
+    def flush() -> None:
+        results = add_users([name for _, _, name in batch], database_path, pragmas=pragmas)
+        for (line_number, line, _), result in zip(batch, results):
+            if 'error' in result:
+                reject(line_number, line, result['error'])
+            else:
+                totals['imported'] += 1
+        batch.clear()
+        elapsed = time.monotonic() - started
+        logger.info(
+            f"Imported {totals['imported']} users, rejected {totals['rejected']} "
+            f"({totals['read'] / elapsed:.0f} rows/s)"
+        )
+    
+    for line_number, line, name in read_rows(stream, file_format):
+        totals['read'] += 1
+        if name is None and file_format == 'ndjson':
+            reject(line_number, line, "Invalid JSON or missing name")
+            continue
+        
+        is_valid, error_msg = validate_name(name, max_name_length)
+        if not is_valid:
+            reject(line_number, line, error_msg)
+            continue
+        
+        batch.append((line_number, line, name.strip()))
+        if len(batch) >= batch_size:
+            flush()
+    
+    if batch:
+        flush()
+    
+    elapsed = time.monotonic() - started
+    return {
+        **totals,
+        'elapsed_seconds': round(elapsed, 3),
+        'rows_per_second': round(totals['read'] / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the import CLI.
+    
+    Args:
+        argv: Command-line arguments (defaults to ``sys.argv[1:]``).
+        
+    Returns:
+        Process exit code.
+    """
+    config = get_config()
+    parser = argparse.ArgumentParser(
+        prog='python -m app_latest.importer',
+        description='Bulk import users from an NDJSON or CSV file.'
+    )
+    parser.add_argument('input', help='Input file path, or - for stdin')
+    parser.add_argument(
+        '--format',
+        choices=['ndjson', 'csv'],
+        help='Input format (default: from file extension, else ndjson)'
+    )
+    parser.add_argument(
+        '--database',
+        default=config['DATABASE_PATH'],
+        help='Path to SQLite database (default: DATABASE_PATH)'
+    )
+    parser.add_argument('--batch-size', type=int, default=5000, help='Rows per transaction')
+    parser.add_argument(
+        '--synchronous',
+        default='OFF',
+        choices=['OFF', 'NORMAL', 'FULL', 'EXTRA'],
+        help='PRAGMA synchronous during the load (default: OFF)'
+    )
+    parser.add_argument('--cache-size', type=int, help='PRAGMA cache_size during the load')
+    parser.add_argument('--rejects', help='Write rejected rows as NDJSON to this file')
+    args = parser.parse_args(argv)
+    
+    if args.batch_size <= 0:
+        parser.error('--batch-size must be positive')
+    
+    logging.basicConfig(
+        level=getattr(logging, config['LOG_LEVEL'], logging.INFO),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    file_format = args.format or ('csv' if args.input.lower().endswith('.csv') else 'ndjson')
+    pragmas: Dict[str, Any] = {'synchronous': args.synchronous}
+    if args.cache_size is not None:
+        pragmas['cache_size'] = args.cache_size
+    
+    migrate(args.database, config)
+    
+    rejects = open(args.rejects, 'w', encoding='utf-8') if args.rejects else None
+    stream = sys.stdin if args.input == '-' else open(
+        args.input, 'r', encoding='utf-8', newline=''
+    )
+    try:
+        summary = import_users(
+            stream,
+            args.database,
+            file_format=file_format,
+            batch_size=args.batch_size,
+            max_name_length=config['MAX_NAME_LENGTH'],
+            pragmas=pragmas,
+            rejects=rejects
+        )
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        if rejects is not None:
+            rejects.close()
+    
+    print(json.dumps(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
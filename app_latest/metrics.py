@@ -0,0 +1,269 @@
+"""
+Request latency histograms in Prometheus text format.
+
+``instrument_blueprint`` adds ``before_request``/``after_request`` hooks
+that record each request's latency, by endpoint, method and status, into
+fixed-bucket histograms. Recording is one dict lookup and a bisect under
+a short per-process lock.
+
+Gunicorn workers are separate processes, so with ``METRICS_DIR`` set each
+worker's background thread writes its cumulative histograms to
+``<METRICS_DIR>/latency_<pid>.json`` every ``METRICS_WRITE_INTERVAL``
+seconds, and ``render_metrics`` sums the files of all workers. Files of
+exited workers are kept so counters never go backwards; clear the
+directory when the service (re)starts. Without ``METRICS_DIR`` only the
+serving process's own histograms are reported, with a ``pid`` label so
+that series of different workers never mix; aggregate them in queries
+(e.g. ``sum without (pid)``).
+"""
+
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from flask import Blueprint, Response, g, request
+
+from app_latest.config import get_config
+
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; an implicit +Inf bucket follows
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+_METRIC_NAME = 'http_request_duration_seconds'
+
+# (endpoint, method, status); each series is [bucket counts..., +Inf count, sum]
+HistogramKey = Tuple[str, str, str]
+
+
+class LatencyHistograms:
+    """
+    Thread-safe cumulative latency histograms keyed by endpoint, method and status.
+    """
+    
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self._data: Dict[HistogramKey, List[float]] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, endpoint: str, method: str, status: int, seconds: float) -> None:
+        """
+        Record one request.
+        
+        Args:
+            endpoint: Flask endpoint name.
+            method: HTTP method.
+            status: Response status code.
+            seconds: Request latency.
+        """
+        key = (endpoint, method, str(status))
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._data.get(key)
+            if series is None:
+                series = self._data[key] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += seconds
+    
+    def snapshot(self) -> Dict[HistogramKey, List[float]]:
+        """
+        Copy the current histograms.
+        
+        Returns:
+            Mapping of key to non-cumulative bucket counts followed by the sum.
+        """
+        with self._lock:
+            return {key: list(series) for key, series in self._data.items()}
+
+
+_histograms = LatencyHistograms()
+_writer_pid: Optional[int] = None
+_writer_lock = threading.Lock()
+
+
+def _snapshot_path(directory: str, pid: int) -> str:
+    """Get the snapshot file of a worker process."""
+    return os.path.join(directory, f"latency_{pid}.json")
+
+
+def write_snapshot(directory: str) -> None:
+    """
+    Atomically write this process's histograms to its snapshot file.
+    
+    Args:
+        directory: Shared metrics directory.
+    """
+    payload = {
+        'buckets': list(_histograms.buckets),
+        'series': [[*key, series] for key, series in _histograms.snapshot().items()],
+    }
+    path = _snapshot_path(directory, os.getpid())
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f)
+    os.replace(temp_path, path)
+
+
+def _run_writer(directory: str, interval: float) -> None:
+    """Snapshot writer thread main loop."""
+    # Event.wait rather than time.sleep, so the profiler sees the thread as idle
+    ticker = threading.Event()
+    while not ticker.wait(interval):
+        try:
+            write_snapshot(directory)
+        except OSError as e:
+            logger.warning(f"Failed to write metrics snapshot to {directory}: {e}")
+
+
+@lru_cache(maxsize=1)
+def _metrics_settings() -> Tuple[str, float]:
+    """
+    Get the metrics directory and write interval, read once per process.
+    
+    Returns:
+        Tuple of (``METRICS_DIR``, ``METRICS_WRITE_INTERVAL``).
+    """
+    config = get_config()
+    return config['METRICS_DIR'], config['METRICS_WRITE_INTERVAL']
+
+
+def _ensure_writer() -> None:
+    """Start this process's snapshot writer thread if ``METRICS_DIR`` is set."""
+    global _writer_pid
+    
+    if _writer_pid == os.getpid():
+        return
+    with _writer_lock:
+        if _writer_pid == os.getpid():
+            return
+        _writer_pid = os.getpid()
+        directory, interval = _metrics_settings()
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        threading.Thread(
+            target=_run_writer,
+            args=(directory, max(0.1, interval)),
+            name='metrics-snapshot-writer',
+            daemon=True
+        ).start()
+
+
+def _start_timer() -> None:
+    """``before_request`` hook: remember when the request started."""
+    g.metrics_started_at = time.perf_counter()
+
+
+def _record_latency(response: Response) -> Response:
+    """``after_request`` hook: record the request's latency."""
+    started_at = g.pop('metrics_started_at', None)
+    if started_at is not None:
+        _histograms.observe(
+            request.endpoint or 'unknown',
+            request.method,
+            response.status_code,
+            time.perf_counter() - started_at
+        )
+        _ensure_writer()
+    return response
+
+
+def instrument_blueprint(blueprint: Blueprint) -> None:
+    """
+    Record the latency of every request handled by a blueprint.
+    
+    Streamed responses are timed until the response object is returned,
+    not until the body is fully sent.
+    
+    Args:
+        blueprint: Blueprint to instrument.
+    """
+    blueprint.before_request(_start_timer)
+    blueprint.after_request(_record_latency)
+
+
+def _collect(directory: str) -> Tuple[Tuple[float, ...], Dict[HistogramKey, List[float]]]:
+    """
+    Sum the histograms of all worker snapshot files and this process.
+    
+    Args:
+        directory: Shared metrics directory ('' for this process only).
+        
+    Returns:
+        Tuple of (bucket bounds, summed histograms).
+    """
+    buckets = _histograms.buckets
+    totals = _histograms.snapshot()
+    if not directory:
+        return buckets, totals
+    
+    own_path = _snapshot_path(directory, os.getpid())
+    for path in glob.glob(os.path.join(directory, 'latency_*.json')):
+        if path == own_path:
+            continue
+        try:
+            with open(path, encoding='utf-8') as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable metrics snapshot {path}: {e}")
+            continue
+        if tuple(payload.get('buckets', ())) != buckets:
+            logger.warning(f"Skipping metrics snapshot {path} with different buckets")
+            continue
+        for endpoint, method, status, series in payload['series']:
+            key = (endpoint, method, status)
+            current = totals.get(key)
+            totals[key] = series if current is None else [a + b for a, b in zip(current, series)]
+    return buckets, totals
+
+
+def _escape(value: str) -> str:
+    """Escape a Prometheus label value."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_number(value: float) -> str:
+    """Format a sample value (integers without a decimal point)."""
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def render_metrics() -> str:
+    """
+    Render request latency histograms in Prometheus text exposition format.
+    
+    Returns:
+        Metrics text, aggregated across workers when ``METRICS_DIR`` is set,
+        else this worker's histograms labelled with its ``pid``.
+    """
+    directory = _metrics_settings()[0]
+    buckets, totals = _collect(directory)
+    worker_label = '' if directory else f',pid="{os.getpid()}"'
+    bounds = [_format_number(bound) for bound in buckets] + ['+Inf']
+    
+    lines = [
+        f"# HELP {_METRIC_NAME} HTTP request latency by endpoint, method and status.",
+        f"# TYPE {_METRIC_NAME} histogram",
+    ]
+    for (endpoint, method, status), series in sorted(totals.items()):
+        labels = (
+            f'endpoint="{_escape(endpoint)}",method="{_escape(method)}",'
+            f'status="{_escape(status)}"{worker_label}'
+        )
+        cumulative = 0.0
+        for bound, count in zip(bounds, series[:-1]):
+            cumulative += count
+            lines.append(
+                f'{_METRIC_NAME}_bucket{{{labels},le="{bound}"}} {_format_number(cumulative)}'
+            )
+        lines.append(f"{_METRIC_NAME}_sum{{{labels}}} {series[-1]!r}")
+        lines.append(f"{_METRIC_NAME}_count{{{labels}}} {_format_number(cumulative)}")
+    return "\n".join(lines) + "\n"
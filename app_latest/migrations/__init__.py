@@ -0,0 +1,263 @@
+"""
+Versioned schema migrations.
+
+Migrations are modules in this package named ``m<NNNN>_<description>.py``
+and applied in version order. Each module defines ``upgrade(conn, config)``
+which runs inside a ``BEGIN IMMEDIATE`` transaction together with the
+``schema_version`` bookkeeping, and may define ``prepare(conn, config)``
+for read-only work that should happen before the write lock is taken.
+
+A file lock next to the database ensures only one process migrates;
+``migrate`` first does a read-only version check so workers starting
+against an up-to-date database run no DDL at all.
+"""
+
+import importlib
+import logging
+import pkgutil
+import re
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from types import ModuleType
+from typing import Any, Dict, Generator, List, Optional, Tuple
+
+from app_latest.config import get_config
+from app_latest.database import get_db_connection
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+_MIGRATION_NAME = re.compile(r'^m(\d{4})_(\w+)$')
+
+
+@lru_cache(maxsize=1)
+def discover_migrations() -> Tuple[Tuple[int, str, ModuleType], ...]:
+    """
+    Find all migration modules in this package.
+    
+    Returns:
+        Tuple of (version, name, module) sorted by version.
+        
+    Raises:
+        RuntimeError: If two migrations share a version number.
+    """
+    found: Dict[int, Tuple[int, str, ModuleType]] = {}
+    for info in pkgutil.iter_modules(__path__):
+        match = _MIGRATION_NAME.match(info.name)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in found:
+            raise RuntimeError(f"Duplicate migration version {version}: {info.name}")
+        module = importlib.import_module(f"{__name__}.{info.name}")
+        found[version] = (version, match.group(2), module)
+    return tuple(found[version] for version in sorted(found))
+
+
+def latest_version() -> int:
+    """
+    Get the newest schema version known to this code.
+    
+    Returns:
+        Highest migration version, or 0 if there are none.
+    """
+    migrations = discover_migrations()
+    return migrations[-1][0] if migrations else 0
+
+
+def get_current_version(database_path: str) -> int:
+    """
+    Get the schema version recorded in the database.
+    
+    Args:
+        database_path: Path to SQLite database file.
+        
+    Returns:
+        Applied schema version, or 0 for an unmigrated database.
+        
+    Raises:
+        sqlite3.Error: If database operation fails.
+    """
+    with get_db_connection(database_path) as conn:
+        table = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+        ).fetchone()
+        if not table:
+            return 0
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+        return row[0] or 0
+
+
+def is_current(database_path: str) -> bool:
+    """
+    Check whether the database schema is up to date (read-only).
+    
+    Args:
+        database_path: Path to SQLite database file.
+        
+    Returns:
+        True if no migrations are pending.
+    """
+    return get_current_version(database_path) >= latest_version()
+
+
+@contextmanager
+def _migration_lock(database_path: str) -> Generator[None, None, None]:
+    """
+    Hold an exclusive inter-process lock for migrating a database.
+    
+    Args:
+        database_path: Path to SQLite database file.
+    """
+    if fcntl is None or database_path == ':memory:':
+        logger.warning("File locking unavailable, migrating without a process lock")
+        yield
+        return
+    
+    with open(f"{database_path}.migrate.lock", 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def migrate(database_path: str, config: Optional[Dict[str, Any]] = None) -> List[int]:
+    """
+    Apply all pending migrations.
+    
+    Args:
+        database_path: Path to SQLite database file.
+        config: Application configuration passed to migrations
+            (defaults to ``get_config()``).
+        
+    Returns:
+        List of versions applied by this call (empty if already current).
+        
+    Raises:
+        sqlite3.Error: If a migration fails; it is rolled back and
+            later migrations are not attempted.
+    """
+    if is_current(database_path):
+        logger.debug(f"Database schema at {database_path} is current")
+        return []
+    
+    if config is None:
+        config = get_config()
+    
+    applied: List[int] = []
+    with _migration_lock(database_path):
+        # Another process may have migrated while we waited for the lock
+        current = get_current_version(database_path)
+        
+        with get_db_connection(database_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            for version, name, module in discover_migrations():
+                if version <= current:
+                    continue
+                
+                logger.info(f"Applying migration {version:04d}_{name}")
+                started = time.monotonic()
+                
+                prepare = getattr(module, 'prepare', None)
+                if prepare is not None:
+                    prepare(conn, config)
+                
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    module.upgrade(conn, config)
+                    conn.execute(
+                        "INSERT INTO schema_version (version, name) VALUES (?, ?)",
+                        (version, name)
+                    )
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    logger.error(f"Migration {version:04d}_{name} failed", exc_info=True)
+                    raise
+                
+                applied.append(version)
+                logger.info(
+                    f"Applied migration {version:04d}_{name} "
+                    f"in {time.monotonic() - started:.2f}s"
+                )
+    
+    return applied
+
+
+def dedupe_user_names(
+    database_path: str,
+    nocase: bool = False,
+    dry_run: bool = False
+) -> List[Tuple[int, str, str]]:
+    """
+    Rename users whose name duplicates an earlier user's name.
+    
+    Migration 0002 cannot build the unique name index while duplicates
+    exist. The oldest user (lowest ID) keeps each name; every later copy
+    is renamed to ``<name>#<id>`` (with a further suffix in the unlikely
+    case that is taken too). Nothing is deleted, so no user loses data,
+    but renamed users must log in with their new name.
+    
+    Args:
+        database_path: Path to SQLite database file.
+        nocase: Treat names differing only in ASCII case as duplicates
+            (match ``USER_NAME_NOCASE``).
+        dry_run: Report the renames without applying them.
+        
+    Returns:
+        List of (user ID, old name, new name), by old name then ID.
+        
+    Raises:
+        sqlite3.Error: If database operation fails; nothing is renamed.
+    """
+    collation = " COLLATE NOCASE" if nocase else ""
+    renames: List[Tuple[int, str, str]] = []
+    
+    with _migration_lock(database_path):
+        with get_db_connection(database_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                duplicates = conn.execute(
+                    f"SELECT id, name FROM ("
+                    f"    SELECT id, name, ROW_NUMBER() OVER ("
+                    f"        PARTITION BY name{collation} ORDER BY id"
+                    f"    ) AS copy FROM users"
+                    f") WHERE copy > 1 ORDER BY name{collation}, id"
+                ).fetchall()
+                
+                for row in duplicates:
+                    new_name = f"{row['name']}#{row['id']}"
+                    attempt = 1
+                    while conn.execute(
+                        f"SELECT 1 FROM users WHERE name{collation} = ?", (new_name,)
+                    ).fetchone():
+                        attempt += 1
+                        new_name = f"{row['name']}#{row['id']}-{attempt}"
+                    conn.execute("UPDATE users SET name = ? WHERE id = ?", (new_name, row['id']))
+                    renames.append((row['id'], row['name'], new_name))
+                
+                if dry_run:
+                    conn.rollback()
+                else:
+                    conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+    
+    if renames and not dry_run:
+        logger.info(f"Renamed {len(renames)} users with duplicate names in {database_path}")
+    return renames
@@ -0,0 +1,83 @@
+"""
+Migration command-line entry point.
+
+Usage:
+    python -m app_latest.migrations [upgrade|status|dedupe-names] [--database PATH]
+
+Run ``upgrade`` once before starting Gunicorn workers. If migration 0002
+stops on duplicate user names, run ``dedupe-names`` (``--dry-run`` first
+to review the renames) and then ``upgrade`` again.
+"""
+
+import argparse
+import logging
+import sys
+from typing import List, Optional
+
+from app_latest.config import get_config
+from app_latest.migrations import (
+    dedupe_user_names, get_current_version, latest_version, migrate
+)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the migration CLI.
+    
+    Args:
+        argv: Command-line arguments (defaults to ``sys.argv[1:]``).
+        
+    Returns:
+        Process exit code.
+    """
+    config = get_config()
+    parser = argparse.ArgumentParser(
+        prog='python -m app_latest.migrations',
+        description='Apply or inspect database schema migrations.'
+    )
+    parser.add_argument(
+        'command',
+        nargs='?',
+        default='upgrade',
+        choices=['upgrade', 'status', 'dedupe-names']
+    )
+    parser.add_argument(
+        '--database',
+        default=config['DATABASE_PATH'],
+        help='Path to SQLite database (default: DATABASE_PATH)'
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='dedupe-names: list the renames without applying them'
+    )
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(
+        level=getattr(logging, config['LOG_LEVEL'], logging.INFO),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    if args.command == 'status':
+        current = get_current_version(args.database)
+        print(f"current: {current}, latest: {latest_version()}")
+        return 0 if current >= latest_version() else 1
+    
+    if args.command == 'dedupe-names':
+        renames = dedupe_user_names(args.database, config['USER_NAME_NOCASE'], args.dry_run)
+        verb = "Would rename" if args.dry_run else "Renamed"
+        for user_id, old_name, new_name in renames:
+            print(f"{verb} user {user_id}: {old_name!r} -> {new_name!r}")
+        print(f"{verb} {len(renames)} users with duplicate names")
+        return 0
+    
+    applied = migrate(args.database, config)
+    if applied:
+        print(f"Applied migrations: {', '.join(str(version) for version in applied)}")
+    else:
+        print("Database schema is up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,24 @@
+"""
+Create the users table.
+"""
+
+import sqlite3
+from typing import Any, Dict
+
+
+def upgrade(conn: sqlite3.Connection, config: Dict[str, Any]) -> None:
+    """
+    Create users table if it doesn't exist (pre-migration databases have it).
+    
+    Args:
+        conn: Connection inside the migration transaction.
+        config: Application configuration.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            password_hash TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
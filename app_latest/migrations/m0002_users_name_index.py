@@ -0,0 +1,72 @@
+"""
+Add a unique index on users.name.
+
+SQLite cannot build an index concurrently, so the build is kept short
+instead: ``prepare`` reports duplicates and reads the ``name`` column
+into the page cache before the write lock is taken, then ``upgrade``
+builds the index inside the migration transaction. With WAL, readers
+continue during the build; writers wait up to ``busy_timeout``.
+
+Names were not unique before this migration. If the database holds
+duplicates the migration stops; ``python -m app_latest.migrations
+dedupe-names`` renames all but the oldest copy of each name.
+
+``USER_NAME_NOCASE`` selects a case-insensitive (SQLite NOCASE, ASCII
+only) index. It is read when this migration runs; changing it later
+requires a new migration.
+"""
+
+import sqlite3
+from typing import Any, Dict
+
+from app_latest.database import USER_NAME_INDEX, USER_NAME_INDEX_NOCASE
+
+
+def _collation(config: Dict[str, Any]) -> str:
+    """Get the COLLATE clause for the configured name comparison."""
+    return " COLLATE NOCASE" if config['USER_NAME_NOCASE'] else ""
+
+
+def prepare(conn: sqlite3.Connection, config: Dict[str, Any]) -> None:
+    """
+    Check for duplicates and warm the page cache outside the write lock.
+    
+    Args:
+        conn: Connection outside any transaction.
+        config: Application configuration.
+        
+    Raises:
+        sqlite3.IntegrityError: If existing rows contain duplicate names.
+    """
+    collation = _collation(config)
+    duplicates = conn.execute(
+        f"SELECT name{collation} AS name, COUNT(*) AS copies FROM users "
+        f"GROUP BY name{collation} HAVING COUNT(*) > 1 LIMIT 5"
+    ).fetchall()
+    if duplicates:
+        sample = ", ".join(f"{row['name'][:20]!r} x{row['copies']}" for row in duplicates)
+        raise sqlite3.IntegrityError(
+            f"Cannot create unique index on users.name: duplicate names exist ({sample}); "
+            "rename them with: python -m app_latest.migrations dedupe-names"
+        )
+    
+    for _ in conn.execute("SELECT name FROM users"):
+        pass
+
+
+def upgrade(conn: sqlite3.Connection, config: Dict[str, Any]) -> None:
+    """
+    Build the unique name index, replacing one with the other collation.
+    
+    Args:
+        conn: Connection inside the migration transaction.
+        config: Application configuration.
+    """
+    nocase = config['USER_NAME_NOCASE']
+    index_name = USER_NAME_INDEX_NOCASE if nocase else USER_NAME_INDEX
+    other_index = USER_NAME_INDEX if nocase else USER_NAME_INDEX_NOCASE
+    
+    conn.execute(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {index_name} ON users (name{_collation(config)})"
+    )
+    conn.execute(f"DROP INDEX IF EXISTS {other_index}")
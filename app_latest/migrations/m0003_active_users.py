@@ -0,0 +1,29 @@
+"""
+Create the active_users table shared by all worker processes.
+
+One row per recently active user; ``last_active_at`` is a Unix timestamp.
+The index serves "most recent first" listings and capacity trimming.
+"""
+
+import sqlite3
+from typing import Any, Dict
+
+
+def upgrade(conn: sqlite3.Connection, config: Dict[str, Any]) -> None:
+    """
+    Create the active_users table and its recency index.
+    
+    Args:
+        conn: Connection inside the migration transaction.
+        config: Application configuration.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS active_users (
+            user_id INTEGER PRIMARY KEY,
+            last_active_at REAL NOT NULL
+        )
+    """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_active_users_last_active "
+        "ON active_users (last_active_at)"
+    )
@@ -0,0 +1,27 @@
+"""
+Create the active_user_buckets table for sliding-window activity counts.
+
+Each row counts the users whose latest activity falls into one
+fixed-width time bucket (``bucket`` is the Unix time divided by the
+bucket width). Summing the buckets of the last N seconds gives the
+number of distinct users active in that window.
+"""
+
+import sqlite3
+from typing import Any, Dict
+
+
+def upgrade(conn: sqlite3.Connection, config: Dict[str, Any]) -> None:
+    """
+    Create the active_user_buckets table.
+    
+    Args:
+        conn: Connection inside the migration transaction.
+        config: Application configuration.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS active_user_buckets (
+            bucket INTEGER PRIMARY KEY,
+            users INTEGER NOT NULL
+        )
+    """)
@@ -0,0 +1,28 @@
+"""
+Create the activity_sketches table for distinct active users per period.
+
+One serialised HyperLogLog (``app_latest.sketches``) per period kind
+(``hour`` or ``day``) and period start (Unix time, UTC-aligned). Workers
+merge their in-process sketches into these rows.
+"""
+
+import sqlite3
+from typing import Any, Dict
+
+
+def upgrade(conn: sqlite3.Connection, config: Dict[str, Any]) -> None:
+    """
+    Create the activity_sketches table.
+    
+    Args:
+        conn: Connection inside the migration transaction.
+        config: Application configuration.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS activity_sketches (
+            period TEXT NOT NULL,
+            period_start INTEGER NOT NULL,
+            sketch BLOB NOT NULL,
+            PRIMARY KEY (period, period_start)
+        )
+    """)
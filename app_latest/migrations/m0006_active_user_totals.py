@@ -0,0 +1,31 @@
+"""
+Create the active_user_totals table holding the size of active_users.
+
+A single row (``id`` = 1) that the flush transaction adjusts by the rows
+it inserts and trims, so reading the number of tracked users is O(1)
+instead of a ``COUNT(*)`` over ``active_users``. Seeded from the
+current table.
+"""
+
+import sqlite3
+from typing import Any, Dict
+
+
+def upgrade(conn: sqlite3.Connection, config: Dict[str, Any]) -> None:
+    """
+    Create and seed the active_user_totals table.
+    
+    Args:
+        conn: Connection inside the migration transaction.
+        config: Application configuration.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS active_user_totals (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            users INTEGER NOT NULL
+        )
+    """)
+    conn.execute(
+        "INSERT OR IGNORE INTO active_user_totals (id, users) "
+        "SELECT 1, COUNT(*) FROM active_users"
+    )
@@ -0,0 +1,247 @@
+"""
+On-demand sampling profiler for a live worker process.
+
+``start_profile`` starts a background timer thread that reads every
+other thread's Python stack with ``sys._current_frames()`` at a fixed
+interval and counts identical stacks. The thread outlives the request
+that started it, so in a single-threaded (Gunicorn sync) worker it
+captures the main thread while it serves the following requests. Nothing
+is installed into the interpreter, so there is no overhead outside a
+run, and at the default 10 ms interval a run costs a few percent of one
+core.
+
+Each run writes ``profile_<pid>.json`` into a directory shared by the
+workers on the host (a "running" marker first, the result at the end),
+so any worker can return the result of any other. The directory must be
+private to the service user (created 0700; symlinks, foreign owners and
+group/other access are refused), so other local users can neither
+redirect the writes nor plant results. Results are rendered
+as collapsed stacks (``frame;frame;... N`` per line), the input format
+of flamegraph.pl and speedscope.
+
+Only one run per process may be active at a time. Threads blocked in
+well-known idle waits (``threading`` conditions and events,
+``queue.get``, ``selectors``, the Gunicorn sync worker's wait) are
+skipped unless ``include_idle`` is set.
+"""
+
+import json
+import logging
+import os
+import stat
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Any, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# (file name, function) of leaf frames that mean the thread is idle
+_IDLE_FRAMES = {
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('queue.py', 'get'),
+    ('selectors.py', 'select'),
+    ('socket.py', 'accept'),
+    ('socketserver.py', 'serve_forever'),
+    ('sync.py', 'wait'),  # Gunicorn sync worker waiting for a connection
+}
+
+_run_lock = threading.Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile is requested while another one is running."""
+
+
+def _frame_label(frame: FrameType) -> str:
+    """Get a stable label for a frame: function (file:first line)."""
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_idle(frame: FrameType) -> bool:
+    """Check whether a leaf frame is a known idle wait."""
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_FRAMES
+
+
+def _collapse(frame: FrameType, thread_name: str) -> str:
+    """Build the collapsed stack of a thread, root first."""
+    labels: List[str] = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name.replace(';', ':'))
+    return ';'.join(reversed(labels))
+
+
+def _profile_path(directory: str, pid: int) -> str:
+    """Get the result file of a worker process."""
+    return os.path.join(directory, f"profile_{pid}.json")
+
+
+def _ensure_private_directory(directory: str) -> None:
+    """
+    Create the result directory (mode 0700) or check an existing one.
+    
+    Args:
+        directory: Result directory.
+        
+    Raises:
+        PermissionError: If the path is a symlink or not a directory, is
+            owned by another user, or is accessible to group or others.
+    """
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"Profile directory {directory} is not a directory")
+    if hasattr(os, 'getuid') and info.st_uid != os.getuid():
+        raise PermissionError(f"Profile directory {directory} is owned by another user")
+    if info.st_mode & 0o077:
+        raise PermissionError(f"Profile directory {directory} is accessible to other users")
+
+
+def _write_result(directory: str, result: Dict[str, Any]) -> None:
+    """Atomically write this process's profile result file."""
+    path = _profile_path(directory, os.getpid())
+    # mkstemp creates a fresh 0600 file (O_EXCL), never following a planted link
+    fd, temp_path = tempfile.mkstemp(prefix=f"profile_{os.getpid()}.", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def _sample(duration: float, interval: float, include_idle: bool) -> Dict[str, Any]:
+    """
+    Sample the stacks of all other threads (runs on the timer thread).
+    
+    Args:
+        duration: Seconds to sample for.
+        interval: Seconds between samples.
+        include_idle: Also count threads blocked in known idle waits.
+        
+    Returns:
+        Dictionary with ``stacks`` (collapsed stack -> count) and ``samples``.
+    """
+    stacks: Counter = Counter()
+    samples = 0
+    own_ident = threading.get_ident()
+    deadline = time.monotonic() + duration
+    next_sample = time.monotonic()
+    
+    while next_sample < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            if not include_idle and _is_idle(frame):
+                continue
+            stacks[_collapse(frame, names.get(ident, f"thread-{ident}"))] += 1
+        samples += 1
+        
+        next_sample += interval
+        delay = next_sample - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_sample = time.monotonic()  # Fell behind: skip missed ticks
+    
+    return {'stacks': dict(stacks), 'samples': samples}
+
+
+def start_profile(
+    directory: str,
+    duration: float,
+    interval: float = 0.01,
+    include_idle: bool = False
+) -> None:
+    """
+    Start sampling this process in the background.
+    
+    Args:
+        directory: Directory shared by the workers for result files.
+        duration: Seconds to sample for.
+        interval: Seconds between samples.
+        include_idle: Also count threads blocked in known idle waits.
+        
+    Raises:
+        ProfilerBusyError: If another run is in progress in this process.
+        OSError: If the result directory is not writable or not private.
+    """
+    if not _run_lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profile is already running in this process")
+    
+    base = {
+        'pid': os.getpid(),
+        'started_at': time.time(),
+        'seconds': duration,
+        'interval_ms': interval * 1000.0,
+    }
+    try:
+        _ensure_private_directory(directory)
+        _write_result(directory, {**base, 'status': 'running'})
+    except OSError:
+        _run_lock.release()
+        raise
+    
+    def run() -> None:
+        try:
+            result = {**base, 'status': 'done', **_sample(duration, interval, include_idle)}
+            _write_result(directory, result)
+            logger.info(
+                f"Profiled worker {os.getpid()} for {duration}s: {result['samples']} samples"
+            )
+        except Exception as e:
+            logger.error(f"Sampling profiler failed: {e}", exc_info=True)
+        finally:
+            _run_lock.release()
+    
+    threading.Thread(target=run, name='sampling-profiler', daemon=True).start()
+
+
+def read_profile(directory: str, pid: int) -> Optional[Dict[str, Any]]:
+    """
+    Read the latest profile of a worker process.
+    
+    Args:
+        directory: Directory shared by the workers for result files.
+        pid: Worker process ID.
+        
+    Returns:
+        Result with ``status`` ``running`` or ``done`` (then also
+        ``stacks`` and ``samples``), or None if the worker has none.
+        
+    Raises:
+        PermissionError: If the result directory is not private.
+    """
+    _ensure_private_directory(directory)
+    try:
+        with open(_profile_path(directory, pid), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Unreadable profile of worker {pid}: {e}")
+        return None
+
+
+def format_collapsed(stacks: Dict[str, int]) -> str:
+    """
+    Render stacks in collapsed format, most frequent first.
+    
+    Args:
+        stacks: Collapsed stack -> sample count.
+        
+    Returns:
+        One ``stack count`` line per stack.
+    """
+    ordered = sorted(stacks.items(), key=lambda item: item[1], reverse=True)
+    return ''.join(f"{stack} {count}\n" for stack, count in ordered)
@@ -5,17 +5,49 @@ Handles HTTP requests and responses only.
 Business logic is delegated to services layer.
 """
 
+import base64
+import binascii
+import csv
+import hmac
+import io
+import json
 import logging
+import os
 import sqlite3
-from flask import Blueprint, request, jsonify, current_app
-from typing import Tuple, Dict, Any
+import time
+from flask import Blueprint, Response, request, jsonify, current_app
+from typing import Tuple, Dict, Any, Iterator, List, Optional, Union
 
-from app_latest.services import add_user, get_user
+from app_latest.config import get_config
+from app_latest.hash_executor import HashingUnavailableError
+from app_latest.metrics import instrument_blueprint, render_metrics
+from app_latest.profiler import ProfilerBusyError, format_collapsed, read_profile, start_profile
+from app_latest.sql_timing import get_query_stats
+from app_latest.services import (
+    add_user, add_users, authenticate_user, get_active_user_counts, get_active_users,
+    get_active_users_stats, get_distinct_active_users, get_hot_users, get_runtime_stats,
+    get_user, get_users, iter_users, list_users, record_user_lookup, set_user_active
+)
 
 
 logger = logging.getLogger(__name__)
 api_bp = Blueprint('api', __name__)
 
+if get_config()['METRICS_ENABLED']:
+    instrument_blueprint(api_bp)
+
+# Upper bound on password length keeps hashing cost per request bounded
+MAX_PASSWORD_LENGTH = 128
+
+# Leading characters that make spreadsheets evaluate a CSV cell as a formula
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# Largest value SQLite can bind as INTEGER; larger IDs would overflow at bind time
+MAX_SQLITE_INTEGER = 2**63 - 1
+
+# Seconds past its end after which an unfinished profile run counts as lost
+PROFILE_GRACE_SECONDS = 30
+
 
 def validate_name(name: Any, max_length: int = 255) -> Tuple[bool, Optional[str]]:
     """
@@ -49,6 +81,29 @@ def validate_name(name: Any, max_length: int = 255) -> Tuple[bool, Optional[str]
     return True, None
 
 
+def validate_password(password: Any, min_length: int = 8) -> Tuple[bool, Optional[str]]:
+    """
+    Validate user password.
+    
+    Args:
+        password: Password to validate.
+        min_length: Minimum allowed length.
+        
+    Returns:
+        Tuple of (is_valid, error_message).
+    """
+    if not isinstance(password, str):
+        return False, "Password must be a string"
+    
+    if len(password) < min_length:
+        return False, f"Password must be at least {min_length} characters"
+    
+    if len(password) > MAX_PASSWORD_LENGTH:
+        return False, f"Password must be no longer than {MAX_PASSWORD_LENGTH} characters"
+    
+    return True, None
+
+
 @api_bp.route('/users', methods=['POST'])
 def create_user() -> Tuple[Dict[str, Any], int]:
     """
@@ -56,7 +111,8 @@ def create_user() -> Tuple[Dict[str, Any], int]:
     
     Request body:
         {
-            "name": "User Name"
+            "name": "User Name",
+            "password": "optional password"
         }
         
     Returns:
@@ -89,14 +145,26 @@ def create_user() -> Tuple[Dict[str, Any], int]:
     if not is_valid:
         return jsonify({"error": error_msg}), 400
     
+    password = data.get('password')
+    if password is not None:
+        min_length = current_app.config.get('MIN_PASSWORD_LENGTH', 8)
+        is_valid, error_msg = validate_password(password, min_length)
+        if not is_valid:
+            return jsonify({"error": error_msg}), 400
+    
     name = data['name'].strip()
     database_path = current_app.config['DATABASE_PATH']
     
     try:
-        user_id = add_user(name, database_path)
+        user_id = add_user(name, database_path, password=password)
+        set_user_active(user_id, database_path)
         logger.info(f"User created successfully: ID={user_id}, name={name[:20]}")
         return jsonify({"id": user_id, "name": name}), 201
     
+    except HashingUnavailableError as e:
+        logger.warning(f"Password hashing unavailable: {e}")
+        return jsonify({"error": "Service busy, please retry"}), 503
+    
     except sqlite3.IntegrityError as e:
         logger.warning(f"Integrity error creating user: {e}")
         return jsonify({"error": "User with this name may already exist"}), 409
@@ -114,6 +182,401 @@ def create_user() -> Tuple[Dict[str, Any], int]:
         return jsonify({"error": "Internal server error"}), 500
 
 
+@api_bp.route('/users:batch', methods=['POST'])
+def create_users_batch() -> Tuple[Dict[str, Any], int]:
+    """
+    Bulk create users endpoint.
+    
+    Request body:
+        {
+            "names": ["User One", "User Two"]
+        }
+        
+    Valid names are inserted in a single transaction. Each item gets
+    its own result with ``status`` 201, 400 (validation) or 409
+    (duplicate), in request order.
+        
+    Returns:
+        JSON response with per-item results and status code.
+    """
+    if not request.is_json:
+        return jsonify({"error": "Content-Type must be application/json"}), 400
+    
+    # Batch bodies are large, so require a declared length up front
+    if request.content_length is None:
+        return jsonify({"error": "Content-Length is required"}), 411
+    
+    max_body = current_app.config.get('MAX_BATCH_BODY_SIZE', 1048576)
+    if request.content_length > max_body:
+        return jsonify({"error": "Request body too large"}), 413
+    
+    try:
+        data = request.get_json(force=False)
+    except Exception as e:
+        logger.warning(f"Invalid JSON in request: {e}")
+        return jsonify({"error": "Invalid JSON format"}), 400
+    
+    if not isinstance(data, dict) or not isinstance(data.get('names'), list):
+        return jsonify({"error": "names must be a list"}), 400
+    
+    names = data['names']
+    max_items = current_app.config.get('MAX_BATCH_SIZE', 1000)
+    if not names:
+        return jsonify({"error": "names must not be empty"}), 400
+    if len(names) > max_items:
+        return jsonify({"error": f"No more than {max_items} names per request"}), 400
+    
+    max_length = current_app.config.get('MAX_NAME_LENGTH', 255)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(names)
+    valid_indexes: List[int] = []
+    for index, name in enumerate(names):
+        is_valid, error_msg = validate_name(name, max_length)
+        if is_valid:
+            valid_indexes.append(index)
+        else:
+            results[index] = {"index": index, "status": 400, "error": error_msg}
+    
+    database_path = current_app.config['DATABASE_PATH']
+    
+    try:
+        if valid_indexes:
+            created = add_users([names[index] for index in valid_indexes], database_path)
+            for index, item in zip(valid_indexes, created):
+                results[index] = {
+                    "index": index,
+                    "status": 409 if 'error' in item else 201,
+                    **item
+                }
+    
+    except sqlite3.Error as e:
+        logger.error(f"Database error creating users: {e}", exc_info=True)
+        return jsonify({"error": "Database error occurred"}), 500
+    
+    except Exception as e:
+        logger.error(f"Unexpected error creating users: {e}", exc_info=True)
+        return jsonify({"error": "Internal server error"}), 500
+    
+    created_count = sum(1 for item in results if item['status'] == 201)
+    logger.info(f"Batch request created {created_count} of {len(names)} users")
+    return jsonify({
+        "created": created_count,
+        "failed": len(names) - created_count,
+        "results": results
+    }), 200
+
+
+def _encode_cursor(after_id: int) -> str:
+    """
+    Encode a pagination position as an opaque cursor.
+    
+    Args:
+        after_id: Last user ID of the current page.
+        
+    Returns:
+        URL-safe cursor string.
+    """
+    return base64.urlsafe_b64encode(f"u:{after_id}".encode()).decode().rstrip('=')
+
+
+def _csv_safe(value: str) -> str:
+    """
+    Neutralise spreadsheet formula injection in a CSV cell.
+    
+    Args:
+        value: Cell text.
+        
+    Returns:
+        The value, prefixed with ``'`` if it would be read as a formula.
+    """
+    return f"'{value}" if value.startswith(CSV_FORMULA_PREFIXES) else value
+
+
+def _decode_cursor(cursor: str) -> Optional[int]:
+    """
+    Decode a cursor produced by ``_encode_cursor``.
+    
+    Args:
+        cursor: Cursor from the query string.
+        
+    Returns:
+        User ID to continue after, or None if the cursor is invalid.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        prefix, _, value = base64.urlsafe_b64decode(padded.encode()).decode().partition(':')
+        after_id = int(value)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        return None
+    if prefix != 'u' or not 0 <= after_id <= MAX_SQLITE_INTEGER:
+        return None
+    return after_id
+
+
+@api_bp.route('/users', methods=['GET'])
+def get_users_endpoint() -> Tuple[Dict[str, Any], int]:
+    """
+    List users or batch get users by ID endpoint.
+    
+    Query parameters:
+        ids: Comma-separated user IDs, e.g. ``?ids=1,2,3`` (batch lookup).
+        cursor: Opaque cursor from a previous page's ``next_cursor``.
+        after_id: List users with ID greater than this (instead of cursor).
+        limit: Page size, capped at ``MAX_PAGE_SIZE``.
+        
+    Returns:
+        JSON response with users and status code.
+    """
+    if 'ids' in request.args:
+        return _get_users_batch()
+    return _list_users_page()
+
+
+def _get_users_batch() -> Tuple[Dict[str, Any], int]:
+    """
+    Handle ``GET /users?ids=...``.
+    
+    Returns:
+        JSON response with found users and missing IDs and status code.
+    """
+    raw_ids = request.args.get('ids', '').strip()
+    if not raw_ids:
+        return jsonify({"error": "ids query parameter is required"}), 400
+    
+    parts = [part.strip() for part in raw_ids.split(',') if part.strip()]
+    max_ids = current_app.config.get('MAX_BATCH_IDS', 1000)
+    if len(parts) > max_ids:
+        return jsonify({"error": f"No more than {max_ids} ids per request"}), 400
+    
+    try:
+        user_ids = [int(part) for part in parts]
+    except ValueError:
+        return jsonify({"error": "ids must be positive integers"}), 400
+    
+    if any(not 0 < user_id <= MAX_SQLITE_INTEGER for user_id in user_ids):
+        return jsonify({
+            "error": f"ids must be positive integers up to {MAX_SQLITE_INTEGER}"
+        }), 400
+    
+    database_path = current_app.config['DATABASE_PATH']
+    
+    try:
+        result = get_users(user_ids, database_path)
+        return jsonify(result), 200
+    
+    except sqlite3.Error as e:
+        logger.error(f"Database error getting users: {e}", exc_info=True)
+        return jsonify({"error": "Database error occurred"}), 500
+    
+    except Exception as e:
+        logger.error(f"Unexpected error getting users: {e}", exc_info=True)
+        return jsonify({"error": "Internal server error"}), 500
+
+
+def _list_users_page() -> Tuple[Dict[str, Any], int]:
+    """
+    Handle ``GET /users?cursor=|after_id=&limit=`` (keyset pagination).
+    
+    Returns:
+        JSON response with a page of users, ``next_cursor`` and status code.
+    """
+    after_id = 0
+    if request.args.get('cursor'):
+        decoded = _decode_cursor(request.args['cursor'])
+        if decoded is None:
+            return jsonify({"error": "Invalid cursor"}), 400
+        after_id = decoded
+    elif request.args.get('after_id'):
+        try:
+            after_id = int(request.args['after_id'])
+        except ValueError:
+            return jsonify({"error": "after_id must be a non-negative integer"}), 400
+        if not 0 <= after_id <= MAX_SQLITE_INTEGER:
+            return jsonify({
+                "error": f"after_id must be a non-negative integer up to {MAX_SQLITE_INTEGER}"
+            }), 400
+    
+    max_page_size = current_app.config.get('MAX_PAGE_SIZE', 100)
+    try:
+        limit = int(request.args.get('limit', min(50, max_page_size)))
+    except ValueError:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    if limit <= 0:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    limit = min(limit, max_page_size)
+    
+    database_path = current_app.config['DATABASE_PATH']
+    
+    try:
+        page = list_users(database_path, after_id=after_id, limit=limit)
+        next_after_id = page['next_after_id']
+        return jsonify({
+            "users": page['users'],
+            "next_cursor": _encode_cursor(next_after_id) if next_after_id else None
+        }), 200
+    
+    except sqlite3.Error as e:
+        logger.error(f"Database error listing users: {e}", exc_info=True)
+        return jsonify({"error": "Database error occurred"}), 500
+    
+    except Exception as e:
+        logger.error(f"Unexpected error listing users: {e}", exc_info=True)
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@api_bp.route('/users/export', methods=['GET'])
+def export_users() -> Union[Response, Tuple[Dict[str, Any], int]]:
+    """
+    Stream all users as NDJSON (default) or CSV.
+    
+    Query parameters:
+        format: ``ndjson`` or ``csv``.
+        
+    Rows are produced by a generator, so memory use does not depend on
+    table size. A database error mid-stream truncates the response. CSV
+    names that a spreadsheet would evaluate as formulas are prefixed
+    with ``'``.
+        
+    Returns:
+        Streaming response with one user per line.
+    """
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({"error": "format must be ndjson or csv"}), 400
+    
+    database_path = current_app.config['DATABASE_PATH']
+    chunk_size = current_app.config.get('EXPORT_CHUNK_SIZE', 1000)
+    
+    def generate_ndjson() -> Iterator[str]:
+        for user in iter_users(database_path, chunk_size):
+            yield json.dumps(user, ensure_ascii=False) + '\n'
+    
+    def generate_csv() -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(['id', 'name'])
+        for count, user in enumerate(iter_users(database_path, chunk_size), start=1):
+            writer.writerow([user['id'], _csv_safe(user['name'])])
+            if count % chunk_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    
+    def guarded(rows: Iterator[str]) -> Iterator[str]:
+        try:
+            yield from rows
+        except Exception as e:
+            logger.error(f"User export aborted: {e}", exc_info=True)
+    
+    if export_format == 'csv':
+        body, mimetype = generate_csv(), 'text/csv'
+    else:
+        body, mimetype = generate_ndjson(), 'application/x-ndjson'
+    
+    logger.info(f"Starting user export ({export_format})")
+    return Response(
+        guarded(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=users.{export_format}'}
+    )
+
+
+@api_bp.route('/users/active', methods=['GET'])
+def get_active_users_endpoint() -> Tuple[Dict[str, Any], int]:
+    """
+    List recently active users, most recent first.
+    
+    Users become active when they register or log in. Activity is shared
+    by all worker processes and visible within ``ACTIVE_USERS_FLUSH_INTERVAL``.
+    
+    Query parameters:
+        limit: Maximum number of users (default 100, capped at tracker capacity).
+        
+    Returns:
+        JSON response with active users and tracker size.
+    """
+    try:
+        limit = int(request.args.get('limit', 100))
+    except ValueError:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    if limit <= 0:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    
+    database_path = current_app.config['DATABASE_PATH']
+    
+    try:
+        stats = get_active_users_stats(database_path)
+        return jsonify({
+            "users": get_active_users(database_path, min(limit, stats['capacity'])),
+            **stats
+        }), 200
+    
+    except sqlite3.Error as e:
+        logger.error(f"Database error listing active users: {e}", exc_info=True)
+        return jsonify({"error": "Database error occurred"}), 500
+    
+    except Exception as e:
+        logger.error(f"Unexpected error listing active users: {e}", exc_info=True)
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@api_bp.route('/users/active/counts', methods=['GET'])
+def get_active_user_counts_endpoint() -> Tuple[Dict[str, Any], int]:
+    """
+    Count distinct users active in each sliding window (default 1/5/15 min).
+    
+    Returns:
+        JSON response with per-window counts and status code.
+    """
+    database_path = current_app.config['DATABASE_PATH']
+    
+    try:
+        return jsonify(get_active_user_counts(database_path)), 200
+    
+    except sqlite3.Error as e:
+        logger.error(f"Database error counting active users: {e}", exc_info=True)
+        return jsonify({"error": "Database error occurred"}), 500
+    
+    except Exception as e:
+        logger.error(f"Unexpected error counting active users: {e}", exc_info=True)
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@api_bp.route('/users/active/distinct', methods=['GET'])
+def get_distinct_active_users_endpoint() -> Tuple[Dict[str, Any], int]:
+    """
+    Estimate distinct active users per hour or day.
+    
+    Query parameters:
+        period: ``hour`` (default) or ``day``.
+        periods: Number of most recent periods (default 24).
+        
+    Returns:
+        JSON response with per-period estimates and status code.
+    """
+    period = request.args.get('period', 'hour')
+    try:
+        periods = int(request.args.get('periods', 24))
+    except ValueError:
+        return jsonify({"error": "periods must be a positive integer"}), 400
+    
+    database_path = current_app.config['DATABASE_PATH']
+    
+    try:
+        return jsonify(get_distinct_active_users(database_path, period, periods)), 200
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    except sqlite3.Error as e:
+        logger.error(f"Database error estimating active users: {e}", exc_info=True)
+        return jsonify({"error": "Database error occurred"}), 500
+    
+    except Exception as e:
+        logger.error(f"Unexpected error estimating active users: {e}", exc_info=True)
+        return jsonify({"error": "Internal server error"}), 500
+
+
 @api_bp.route('/users/<int:user_id>', methods=['GET'])
 def get_user_endpoint(user_id: int) -> Tuple[Dict[str, Any], int]:
     """
@@ -125,10 +588,11 @@ def get_user_endpoint(user_id: int) -> Tuple[Dict[str, Any], int]:
     Returns:
         JSON response with user data or error message and status code.
     """
-    if user_id <= 0:
+    if not 0 < user_id <= MAX_SQLITE_INTEGER:
         return jsonify({"error": "Invalid user ID"}), 400
     
     database_path = current_app.config['DATABASE_PATH']
+    record_user_lookup(user_id)
     
     try:
         user = get_user(user_id, database_path)
@@ -147,6 +611,266 @@ def get_user_endpoint(user_id: int) -> Tuple[Dict[str, Any], int]:
         return jsonify({"error": "Internal server error"}), 500
 
 
+@api_bp.route('/auth/login', methods=['POST'])
+def login() -> Tuple[Dict[str, Any], int]:
+    """
+    Password login endpoint.
+    
+    Request body:
+        {
+            "name": "User Name",
+            "password": "password"
+        }
+        
+    Returns:
+        JSON response with user data or error message and status code.
+    """
+    if not request.is_json:
+        return jsonify({"error": "Content-Type must be application/json"}), 400
+    
+    if request.content_length and request.content_length > 1024:
+        return jsonify({"error": "Request body too large"}), 413
+    
+    try:
+        data = request.get_json(force=False)
+    except Exception as e:
+        logger.warning(f"Invalid JSON in request: {e}")
+        return jsonify({"error": "Invalid JSON format"}), 400
+    
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body is required"}), 400
+    
+    name = data.get('name')
+    password = data.get('password')
+    if not isinstance(name, str) or not name.strip() or not isinstance(password, str):
+        return jsonify({"error": "Name and password are required"}), 400
+    
+    max_name_length = current_app.config.get('MAX_NAME_LENGTH', 255)
+    if len(name) > max_name_length or len(password) > MAX_PASSWORD_LENGTH:
+        return jsonify({"error": "Invalid name or password"}), 401
+    
+    database_path = current_app.config['DATABASE_PATH']
+    
+    try:
+        user = authenticate_user(name, password, database_path)
+        
+        if not user:
+            logger.info(f"Failed login for name={name[:20]}")
+            return jsonify({"error": "Invalid name or password"}), 401
+        
+        set_user_active(user['id'], database_path)
+        logger.info(f"User logged in: ID={user['id']}")
+        return jsonify(user), 200
+    
+    except HashingUnavailableError as e:
+        logger.warning(f"Password hashing unavailable: {e}")
+        return jsonify({"error": "Service busy, please retry"}), 503
+    
+    except sqlite3.Error as e:
+        logger.error(f"Database error during login: {e}", exc_info=True)
+        return jsonify({"error": "Database error occurred"}), 500
+    
+    except Exception as e:
+        logger.error(f"Unexpected error during login: {e}", exc_info=True)
+        return jsonify({"error": "Internal server error"}), 500
+
+
+def _check_admin_token() -> Optional[Tuple[Dict[str, Any], int]]:
+    """
+    Check the ``Authorization: Bearer <ADMIN_TOKEN>`` header.
+    
+    Returns:
+        Error response if the request is not authorized, otherwise None.
+    """
+    admin_token = current_app.config.get('ADMIN_TOKEN', '')
+    if not admin_token:
+        return jsonify({"error": "Not found"}), 404
+    
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not hmac.compare_digest(
+        token.strip().encode('utf-8'), admin_token.encode('utf-8')
+    ):
+        return jsonify({"error": "Unauthorized"}), 401
+    return None
+
+
+@api_bp.route('/admin/hot-users', methods=['GET'])
+def get_hot_users_endpoint() -> Tuple[Dict[str, Any], int]:
+    """
+    List the most requested user IDs of ``GET /users/<id>`` (admin only).
+    
+    Counts come from this worker's Count-Min sketch and decay over time;
+    each worker sees a share of the traffic, so the ranking is a sample.
+    
+    Query parameters:
+        limit: Maximum number of IDs (default ``HOT_USERS_TOP_K``).
+        
+    Returns:
+        JSON response with heavy hitters and status code.
+    """
+    error = _check_admin_token()
+    if error:
+        return error
+    
+    limit = None
+    if request.args.get('limit'):
+        try:
+            limit = int(request.args['limit'])
+        except ValueError:
+            return jsonify({"error": "limit must be a positive integer"}), 400
+        if limit <= 0:
+            return jsonify({"error": "limit must be a positive integer"}), 400
+    
+    return jsonify({"pid": os.getpid(), **get_hot_users(limit)}), 200
+
+
+@api_bp.route('/admin/stats', methods=['GET'])
+def get_stats_endpoint() -> Tuple[Dict[str, Any], int]:
+    """
+    Get this worker's runtime statistics (admin only).
+    
+    Returns:
+        JSON response with per-worker statistics and status code.
+    """
+    error = _check_admin_token()
+    if error:
+        return error
+    
+    return jsonify({"pid": os.getpid(), **get_runtime_stats()}), 200
+
+
+@api_bp.route('/admin/sql-stats', methods=['GET'])
+def get_sql_stats_endpoint() -> Tuple[Dict[str, Any], int]:
+    """
+    List SQL statements by total execution time (admin only).
+    
+    Timings are per worker process and only collected when
+    ``SQL_TIMING_ENABLED`` is set.
+    
+    Query parameters:
+        limit: Maximum number of statements (default 50).
+        
+    Returns:
+        JSON response with per-statement timings and status code.
+    """
+    error = _check_admin_token()
+    if error:
+        return error
+    
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    if limit <= 0:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    
+    return jsonify({
+        "pid": os.getpid(),
+        "enabled": current_app.config.get('SQL_TIMING_ENABLED', False),
+        "statements": get_query_stats(limit)
+    }), 200
+
+
+@api_bp.route('/admin/profile', methods=['POST'])
+def start_profile_endpoint() -> Tuple[Dict[str, Any], int]:
+    """
+    Start sampling this worker's thread stacks in the background (admin only).
+    
+    The run outlives the request, so it also captures the thread that
+    serves the following requests (the only one in a Gunicorn sync
+    worker). Fetch the result with ``GET /admin/profile?pid=<pid>``.
+    
+    Query parameters:
+        seconds: Sampling duration (default 10, at most ``PROFILER_MAX_SECONDS``).
+        interval_ms: Milliseconds between samples (default 10, at least 1).
+        idle: ``true`` to include threads blocked in idle waits.
+        
+    Returns:
+        JSON response with the worker pid and status code.
+    """
+    error = _check_admin_token()
+    if error:
+        return error
+    
+    max_seconds = current_app.config.get('PROFILER_MAX_SECONDS', 25)
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        interval_ms = float(request.args.get('interval_ms', 10))
+    except ValueError:
+        return jsonify({"error": "seconds and interval_ms must be numbers"}), 400
+    if not 0 < seconds <= max_seconds:
+        return jsonify({
+            "error": f"seconds must be greater than 0 and at most {max_seconds}"
+        }), 400
+    if interval_ms < 1:
+        return jsonify({"error": "interval_ms must be at least 1"}), 400
+    include_idle = request.args.get('idle', 'false').lower() == 'true'
+    
+    try:
+        start_profile(
+            current_app.config['PROFILER_DIR'], seconds, interval_ms / 1000.0, include_idle
+        )
+    except ProfilerBusyError as e:
+        return jsonify({"error": str(e)}), 409
+    except OSError as e:
+        logger.error(f"Failed to start profile: {e}")
+        return jsonify({"error": "Failed to start profile"}), 500
+    
+    return jsonify({"pid": os.getpid(), "status": "running", "seconds": seconds}), 202
+
+
+@api_bp.route('/admin/profile', methods=['GET'])
+def profile_endpoint() -> Union[Response, Tuple[Dict[str, Any], int]]:
+    """
+    Return the latest profile of a worker as collapsed stacks (admin only).
+    
+    Query parameters:
+        pid: Worker process ID from ``POST /admin/profile`` (default: this worker).
+        
+    Returns:
+        Collapsed stacks as plain text (flamegraph.pl/speedscope input),
+        or a JSON status/error and status code.
+    """
+    error = _check_admin_token()
+    if error:
+        return error
+    
+    try:
+        pid = int(request.args.get('pid', os.getpid()))
+    except ValueError:
+        return jsonify({"error": "pid must be an integer"}), 400
+    
+    try:
+        result = read_profile(current_app.config['PROFILER_DIR'], pid)
+    except OSError as e:
+        logger.error(f"Failed to read profile of worker {pid}: {e}")
+        return jsonify({"error": "Failed to read profile"}), 500
+    if result is None:
+        return jsonify({"error": f"No profile for worker {pid}"}), 404
+    if result['status'] == 'running':
+        # A worker that died mid-run leaves its marker behind
+        if time.time() > result['started_at'] + result['seconds'] + PROFILE_GRACE_SECONDS:
+            return jsonify({"error": f"Profile of worker {pid} did not finish"}), 404
+        return jsonify({"pid": pid, "status": "running", "started_at": result['started_at'],
+                        "seconds": result['seconds']}), 202
+    
+    response = Response(format_collapsed(result['stacks']), mimetype='text/plain')
+    response.headers['X-Profile-Pid'] = str(pid)
+    response.headers['X-Profile-Samples'] = str(result['samples'])
+    return response
+
+
+@api_bp.route('/metrics', methods=['GET'])
+def metrics() -> Response:
+    """
+    Prometheus metrics endpoint.
+    
+    Returns:
+        Request latency histograms in Prometheus text format.
+    """
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+
 @api_bp.route('/health', methods=['GET'])
 def health_check() -> Tuple[Dict[str, str], int]:
     """
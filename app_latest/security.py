@@ -1,30 +1,136 @@
 """
 Password hashing and verification utilities.
 
-Implements secure password storage using PBKDF2 with SHA-256.
-Note: Currently not used in API endpoints, but available for future use.
+Implements secure password storage using PBKDF2 with SHA-256, or the
+memory-hard scrypt (``hashlib.scrypt`` through Werkzeug) when
+``PASSWORD_HASH_METHOD=scrypt``. Hashes are self-describing
+(``pbkdf2:sha256:<iterations>$salt$hash`` or ``scrypt:<N>:<r>:<p>$salt$hash``),
+so verification dispatches on the stored prefix. Hashing runs in the
+process pool from ``app_latest.hash_executor`` (or synchronously when
+the pool is disabled); ``hash_many`` and ``verify_many`` spread bulk
+credential jobs across all cores on a dedicated pool.
 """
 
+import secrets
+import threading
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
 from werkzeug.security import generate_password_hash, check_password_hash
 
+from app_latest.config import get_config
+from app_latest.hash_executor import map_hash_chunks, run_hash_task
 
-def hash_password(password: str) -> str:
+
+# Passwords per bulk pool task in hash_many/verify_many (~1 s at 50 ms per hash)
+BULK_CHUNK_SIZE = 16
+
+_dummy_hash: Optional[str] = None
+_dummy_hash_lock = threading.Lock()
+
+
+def scrypt_memory_bytes(n: int, r: int) -> int:
     """
-    Hash password using PBKDF2 with salt.
+    Get the memory one scrypt hash needs.
     
     Args:
-        password: Plain text password to hash.
+        n: CPU/memory cost (power of two).
+        r: Block size.
+        
+    Returns:
+        Bytes of memory used per hash (``128 * N * r``).
+    """
+    return 128 * n * r
+
+
+@lru_cache(maxsize=1)
+def current_hash_method() -> str:
+    """
+    Get the Werkzeug hash method required by the current policy.
+    
+    Returns:
+        Method string with explicit parameters, e.g. ``pbkdf2:sha256:600000``
+        or ``scrypt:32768:8:1``.
+        
+    Raises:
+        ValueError: If the configured method or its parameters are invalid.
+    """
+    config = get_config()
+    method = config['PASSWORD_HASH_METHOD']
+    
+    if method == 'pbkdf2':
+        return f"pbkdf2:sha256:{config['PASSWORD_HASH_ITERATIONS']}"
+    
+    if method == 'scrypt':
+        n, r, p = config['SCRYPT_N'], config['SCRYPT_R'], config['SCRYPT_P']
+        if n < 2 or n & (n - 1) or r < 1 or p < 1:
+            raise ValueError("SCRYPT_N must be a power of two > 1, SCRYPT_R and SCRYPT_P >= 1")
+        return f"scrypt:{n}:{r}:{p}"
+    
+    raise ValueError(f"Unknown PASSWORD_HASH_METHOD {method!r}, expected pbkdf2 or scrypt")
+
+
+def _parse_method(password_hash: str) -> Tuple[str, Tuple[int, ...]]:
+    """
+    Split a hash's method prefix into algorithm and numeric parameters.
+    
+    Args:
+        password_hash: Stored hash or method string.
         
     Returns:
-        Hashed password string.
+        Tuple of (algorithm, parameters), e.g. ``('pbkdf2:sha256', (600000,))``
+        or ``('scrypt', (32768, 8, 1))``. Parameters are empty if unparseable.
     """
+    parts = password_hash.split('$', 1)[0].split(':')
+    if parts[0] == 'scrypt':
+        algorithm, raw_params = 'scrypt', parts[1:]
+    else:
+        algorithm, raw_params = ':'.join(parts[:2]), parts[2:]
+    if not raw_params or not all(param.isdigit() for param in raw_params):
+        return algorithm, ()
+    return algorithm, tuple(int(param) for param in raw_params)
+
+
+def _generate_hash(password: str, method: str) -> str:
+    """Hash a password (runs inside the hashing pool)."""
     return generate_password_hash(
         password,
-        method='pbkdf2:sha256',
+        method=method,
         salt_length=16
     )
 
 
+def _check_hash(password_hash: str, password: str) -> bool:
+    """Check a password against a hash (runs inside the hashing pool)."""
+    return check_password_hash(password_hash, password)
+
+
+def _generate_hash_chunk(items: List[Tuple[str, str]]) -> List[str]:
+    """Hash a chunk of (password, method) pairs (runs inside the hashing pool)."""
+    return [_generate_hash(password, method) for password, method in items]
+
+
+def _check_hash_chunk(items: List[Tuple[str, str]]) -> List[bool]:
+    """Check a chunk of (hash, password) pairs (runs inside the hashing pool)."""
+    return [_check_hash(password_hash, password) for password_hash, password in items]
+
+
+def hash_password(password: str) -> str:
+    """
+    Hash password with a random salt using ``PASSWORD_HASH_METHOD``.
+    
+    Args:
+        password: Plain text password to hash.
+        
+    Returns:
+        Hashed password string (records method and its cost parameters).
+        
+    Raises:
+        HashingUnavailableError: If the hashing pool is saturated.
+    """
+    return run_hash_task(_generate_hash, password, current_hash_method())
+
+
 def verify_password(password_hash: str, password: str) -> bool:
     """
     Verify password against hash.
@@ -35,6 +141,89 @@ def verify_password(password_hash: str, password: str) -> bool:
         
     Returns:
         True if password matches hash, False otherwise.
+        
+    Raises:
+        HashingUnavailableError: If the hashing pool is saturated.
     """
-    return check_password_hash(password_hash, password)
+    return run_hash_task(_check_hash, password_hash, password)
+
+
+def hash_many(
+    passwords: Iterable[str],
+    chunk_size: int = BULK_CHUNK_SIZE,
+    workers: Optional[int] = None
+) -> List[str]:
+    """
+    Hash many passwords in parallel for offline credential jobs.
+    
+    Args:
+        passwords: Plain text passwords.
+        chunk_size: Passwords per task submitted to the bulk pool.
+        workers: Hashing processes (default: CPU count).
+        
+    Returns:
+        Hashes in the same order as ``passwords``.
+    """
+    method = current_hash_method()
+    return list(map_hash_chunks(
+        _generate_hash_chunk,
+        ((password, method) for password in passwords),
+        chunk_size,
+        workers
+    ))
+
+
+def verify_many(
+    pairs: Iterable[Tuple[str, str]],
+    chunk_size: int = BULK_CHUNK_SIZE,
+    workers: Optional[int] = None
+) -> List[bool]:
+    """
+    Verify many passwords in parallel for offline credential jobs.
+    
+    Args:
+        pairs: (stored hash, plain text password) pairs.
+        chunk_size: Pairs per task submitted to the bulk pool.
+        workers: Hashing processes (default: CPU count).
+        
+    Returns:
+        Verification results in the same order as ``pairs``.
+    """
+    return list(map_hash_chunks(_check_hash_chunk, pairs, chunk_size, workers))
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """
+    Check whether a stored hash is weaker than the current policy.
+    
+    Args:
+        password_hash: Stored password hash.
+        
+    Returns:
+        True if the hash uses another algorithm or any weaker parameter
+        (fewer PBKDF2 iterations, or smaller scrypt N, r or p).
+    """
+    algorithm, params = _parse_method(password_hash)
+    current_algorithm, current_params = _parse_method(current_hash_method())
+    
+    if algorithm != current_algorithm or len(params) != len(current_params):
+        return True
+    return any(param < current for param, current in zip(params, current_params))
 
+
+def verify_dummy_password(password: str) -> None:
+    """
+    Spend the same hashing work as a real verification.
+    
+    Used when the user does not exist, so response time does not reveal
+    which names are registered.
+    
+    Args:
+        password: Password supplied by the client.
+    """
+    global _dummy_hash
+    
+    with _dummy_hash_lock:
+        if _dummy_hash is None:
+            _dummy_hash = hash_password(secrets.token_urlsafe(16))
+    verify_password(_dummy_hash, password)
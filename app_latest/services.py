@@ -6,26 +6,192 @@ Provides thread-safe user management functions.
 
 import logging
 import sqlite3
-import threading
-from typing import List, Optional, Dict, Any
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import lru_cache
+from typing import Iterator, List, Optional, Dict, Any, Tuple
 
-from app_latest.database import get_db_connection
+from app_latest.activity import (
+    SKETCH_MAX_PERIODS, SKETCH_PERIODS, ActiveUserRegistry, get_registry
+)
+from app_latest.cache import LRUCache
+from app_latest.config import get_config
+from app_latest.database import get_db_connection, get_pool_stats
+from app_latest.hash_executor import get_executor_stats
+from app_latest.security import (
+    hash_password, needs_rehash, verify_dummy_password, verify_password
+)
+from app_latest.sketches import HeavyHitters
+from app_latest.writer import get_writer, get_writer_stats
 
 
 logger = logging.getLogger(__name__)
 
-# Thread-safe active users tracking
-_active_users: List[int] = []
-_active_users_lock = threading.Lock()
+# Name lookups must use the same collation as the users.name index
+_USER_BY_NAME_SQL = "SELECT id, name FROM users WHERE name = ?"
+_USER_BY_NAME_NOCASE_SQL = "SELECT id, name FROM users WHERE name = ? COLLATE NOCASE"
+_CREDENTIALS_BY_NAME_SQL = "SELECT id, name, password_hash FROM users WHERE name = ?"
+_CREDENTIALS_BY_NAME_NOCASE_SQL = (
+    "SELECT id, name, password_hash FROM users WHERE name = ? COLLATE NOCASE"
+)
 
+# Bound parameters per IN (...) query, below SQLite's historic 999 limit
+_IN_QUERY_CHUNK_SIZE = 500
 
-def add_user(name: str, database_path: str) -> int:
+
+@lru_cache(maxsize=1)
+def _service_config() -> Dict[str, Any]:
+    """
+    Get configuration for the services layer, read once per process.
+    
+    Returns:
+        Application configuration dictionary.
+    """
+    return get_config()
+
+
+# Read-through caches for user rows. Rows are immutable after add_user,
+# so only found users are cached; write paths call invalidate_user.
+_user_cache = LRUCache(
+    max_size=_service_config()['USER_CACHE_SIZE'],
+    ttl=_service_config()['USER_CACHE_TTL']
+)
+_user_name_cache = LRUCache(
+    max_size=_service_config()['USER_CACHE_SIZE'],
+    ttl=_service_config()['USER_CACHE_TTL']
+)
+
+# Negative cache for IDs that were not found. A miss becomes stale when
+# the ID is created: add_user invalidates it here, and inserts made by
+# other worker processes are picked up once the short TTL expires.
+_missing_user_cache = LRUCache(
+    max_size=_service_config()['NEGATIVE_CACHE_SIZE'],
+    ttl=_service_config()['NEGATIVE_CACHE_TTL']
+)
+
+
+# Most requested user IDs of GET /users/<id> in recent traffic (per worker)
+_hot_users = HeavyHitters(
+    k=_service_config()['HOT_USERS_TOP_K'],
+    width=_service_config()['HOT_USERS_SKETCH_WIDTH'],
+    depth=_service_config()['HOT_USERS_SKETCH_DEPTH'],
+    decay_interval=_service_config()['HOT_USERS_DECAY_INTERVAL'],
+    decay_factor=_service_config()['HOT_USERS_DECAY_FACTOR']
+)
+
+
+def invalidate_user(
+    database_path: str,
+    user_id: Optional[int] = None,
+    name: Optional[str] = None
+) -> None:
+    """
+    Drop cached entries for a user after a write.
+    
+    Args:
+        database_path: Path to database file.
+        user_id: ID of the written user, if known.
+        name: Name of the written user, if known.
+    """
+    if user_id is not None:
+        _user_cache.invalidate((database_path, user_id))
+        _missing_user_cache.invalidate((database_path, user_id))
+    if name is not None:
+        _user_name_cache.invalidate((database_path, name.strip()))
+
+
+def clear_user_cache() -> None:
+    """Drop all cached user entries."""
+    _user_cache.clear()
+    _user_name_cache.clear()
+    _missing_user_cache.clear()
+
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get user cache statistics.
+    
+    Returns:
+        Dictionary with statistics for each user cache.
+    """
+    return {
+        'user_by_id': _user_cache.stats(),
+        'user_by_name': _user_name_cache.stats(),
+        'missing_user_by_id': _missing_user_cache.stats(),
+    }
+
+
+def _insert_user_batch(
+    conn: sqlite3.Connection,
+    rows: List[Tuple[str, Optional[str]]]
+) -> List[Any]:
+    """
+    Insert queued users inside the group-commit transaction.
+    
+    A UNIQUE violation only rolls back its own statement, so the other
+    rows of the batch are still committed.
+    
+    Args:
+        conn: Connection with an open transaction.
+        rows: Tuples of (stripped user name, password hash or None).
+        
+    Returns:
+        New user ID, or the ``sqlite3.IntegrityError`` raised, per row.
+    """
+    results: List[Any] = []
+    for name, password_hash in rows:
+        try:
+            cursor = conn.execute(
+                "INSERT INTO users (name, password_hash) VALUES (?, ?)",
+                (name, password_hash)
+            )
+            results.append(cursor.lastrowid)
+        except sqlite3.IntegrityError as e:
+            results.append(e)
+    return results
+
+
+def _queued_add_user(name: str, password_hash: Optional[str], database_path: str) -> int:
+    """
+    Insert a user through this process's group-commit writer.
+    
+    Args:
+        name: Stripped user name.
+        password_hash: Password hash, or None for users without a password.
+        database_path: Path to database file.
+        
+    Returns:
+        User ID of created user.
+        
+    Raises:
+        sqlite3.IntegrityError: If user with same name already exists.
+        sqlite3.OperationalError: If the write is not committed within
+            ``WRITE_QUEUE_TIMEOUT`` seconds (it may still commit later).
+    """
+    config = _service_config()
+    writer = get_writer(
+        database_path,
+        _insert_user_batch,
+        max_batch=config['WRITE_QUEUE_MAX_BATCH'],
+        max_delay_ms=config['WRITE_QUEUE_MAX_DELAY_MS']
+    )
+    timeout = config['WRITE_QUEUE_TIMEOUT']
+    future = writer.submit((name, password_hash), timeout=timeout)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise sqlite3.OperationalError("Timed out waiting for queued write")
+
+
+def add_user(name: str, database_path: str, password: Optional[str] = None) -> int:
     """
     Add new user to database with SQL injection protection.
     
     Args:
         name: User name (should be validated before calling).
         database_path: Path to database file.
+        password: Optional plain text password (should be validated
+            before calling); only its hash is stored.
         
     Returns:
         User ID of created user.
@@ -33,20 +199,26 @@ def add_user(name: str, database_path: str) -> int:
     Raises:
         sqlite3.IntegrityError: If user with same name already exists.
         sqlite3.Error: If database operation fails.
+        HashingUnavailableError: If the password cannot be hashed in time.
         ValueError: If name is invalid.
     """
     if not name or not isinstance(name, str):
         raise ValueError("Name must be a non-empty string")
     
     try:
-        with get_db_connection(database_path) as conn:
-            cursor = conn.execute(
-                "INSERT INTO users (name) VALUES (?)",
-                (name.strip(),)  # Parameterized query prevents SQL injection
-            )
-            user_id = cursor.lastrowid
-            logger.info(f"User created with ID: {user_id}, name: {name[:20]}")
-            return user_id
+        password_hash = hash_password(password) if password is not None else None
+        if _service_config()['WRITE_QUEUE_ENABLED']:
+            user_id = _queued_add_user(name.strip(), password_hash, database_path)
+        else:
+            with get_db_connection(database_path) as conn:
+                cursor = conn.execute(
+                    "INSERT INTO users (name, password_hash) VALUES (?, ?)",
+                    (name.strip(), password_hash)  # Parameterized query prevents SQL injection
+                )
+                user_id = cursor.lastrowid
+        invalidate_user(database_path, user_id, name)
+        logger.info(f"User created with ID: {user_id}, name: {name[:20]}")
+        return user_id
     except sqlite3.IntegrityError as e:
         logger.warning(f"Failed to create user (integrity error): {e}")
         raise
@@ -55,6 +227,78 @@ def add_user(name: str, database_path: str) -> int:
         raise
 
 
+def add_users(
+    names: List[str],
+    database_path: str,
+    pragmas: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Add many users in a single transaction.
+    
+    Rows are inserted with one ``executemany`` under ``BEGIN IMMEDIATE``,
+    so the whole batch costs one commit. Names that already exist (or
+    repeat earlier in the batch) are skipped by ``INSERT OR IGNORE`` and
+    reported per item; new IDs are read back from the rows added above
+    the previous maximum ID, which no other writer can change while the
+    write lock is held.
+    
+    Args:
+        names: User names (should be validated before calling).
+        database_path: Path to database file.
+        pragmas: PRAGMA overrides for this transaction's connection,
+            e.g. ``{'synchronous': 'OFF'}`` during bulk imports.
+        
+    Returns:
+        One result per input name, in order: ``{"id", "name"}`` if created,
+        or ``{"name", "error"}`` if the name already exists.
+        
+    Raises:
+        sqlite3.Error: If database operation fails (nothing is inserted).
+        ValueError: If any name is invalid.
+    """
+    if not all(name and isinstance(name, str) and name.strip() for name in names):
+        raise ValueError("Names must be non-empty strings")
+    
+    stripped = [name.strip() for name in names]
+    if not stripped:
+        return []
+    
+    try:
+        with get_db_connection(database_path, pragmas=pragmas) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            previous_max = conn.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM users"
+            ).fetchone()[0]
+            conn.executemany(
+                "INSERT OR IGNORE INTO users (name) VALUES (?)",
+                [(name,) for name in stripped]
+            )
+            created = {
+                row["name"]: row["id"]
+                for row in conn.execute(
+                    "SELECT id, name FROM users WHERE id > ? ORDER BY id",
+                    (previous_max,)
+                )
+            }
+    except sqlite3.Error as e:
+        logger.error(f"Failed to create {len(stripped)} users: {e}", exc_info=True)
+        raise
+    
+    results: List[Dict[str, Any]] = []
+    created_count = len(created)
+    for name in stripped:
+        # Only the first occurrence of a name in the batch is created
+        user_id = created.pop(name, None)
+        if user_id is None:
+            results.append({"name": name, "error": "User with this name may already exist"})
+        else:
+            invalidate_user(database_path, user_id, name)
+            results.append({"id": user_id, "name": name})
+    
+    logger.info(f"Batch created {created_count} of {len(stripped)} users")
+    return results
+
+
 def get_user(user_id: int, database_path: str) -> Optional[Dict[str, Any]]:
     """
     Get user by ID safely.
@@ -72,6 +316,13 @@ def get_user(user_id: int, database_path: str) -> Optional[Dict[str, Any]]:
     if not isinstance(user_id, int) or user_id <= 0:
         return None
     
+    key = (database_path, user_id)
+    cached = _user_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+    if _missing_user_cache.get(key):
+        return None
+    
     try:
         with get_db_connection(database_path) as conn:
             cursor = conn.execute(
@@ -79,14 +330,162 @@ def get_user(user_id: int, database_path: str) -> Optional[Dict[str, Any]]:
                 (user_id,)
             )
             row = cursor.fetchone()
-            if row:
-                return {"id": row["id"], "name": row["name"]}
-            return None
+        if row:
+            user = {"id": row["id"], "name": row["name"]}
+            _user_cache.set(key, user)
+            return dict(user)
+        _missing_user_cache.set(key, True)
+        return None
     except sqlite3.Error as e:
         logger.error(f"Failed to get user {user_id}: {e}", exc_info=True)
         raise
 
 
+def get_users(user_ids: List[int], database_path: str) -> Dict[str, List[Any]]:
+    """
+    Get many users by ID with one query per chunk of IDs.
+    
+    Cached users and cached misses are answered from memory; the rest
+    are fetched with ``WHERE id IN (...)`` in chunks of bound parameters.
+    
+    Args:
+        user_ids: User IDs to retrieve (duplicates are ignored).
+        database_path: Path to database file.
+        
+    Returns:
+        Dictionary with ``users`` (found users, in request order) and
+        ``missing`` (IDs that do not exist).
+        
+    Raises:
+        sqlite3.Error: If database operation fails.
+    """
+    ids = list(dict.fromkeys(
+        user_id for user_id in user_ids if isinstance(user_id, int) and user_id > 0
+    ))
+    found: Dict[int, Dict[str, Any]] = {}
+    pending: List[int] = []
+    
+    for user_id in ids:
+        key = (database_path, user_id)
+        cached = _user_cache.get(key)
+        if cached is not None:
+            found[user_id] = cached
+        elif not _missing_user_cache.get(key):
+            pending.append(user_id)
+    
+    try:
+        if pending:
+            with get_db_connection(database_path) as conn:
+                for start in range(0, len(pending), _IN_QUERY_CHUNK_SIZE):
+                    chunk = pending[start:start + _IN_QUERY_CHUNK_SIZE]
+                    # Only "?" placeholders are interpolated; values are bound
+                    placeholders = ",".join("?" * len(chunk))
+                    cursor = conn.execute(
+                        f"SELECT id, name FROM users WHERE id IN ({placeholders})",
+                        chunk
+                    )
+                    for row in cursor:
+                        found[row["id"]] = {"id": row["id"], "name": row["name"]}
+    except sqlite3.Error as e:
+        logger.error(f"Failed to get {len(pending)} users: {e}", exc_info=True)
+        raise
+    
+    for user_id in pending:
+        key = (database_path, user_id)
+        if user_id in found:
+            _user_cache.set(key, found[user_id])
+        else:
+            _missing_user_cache.set(key, True)
+    
+    return {
+        "users": [dict(found[user_id]) for user_id in ids if user_id in found],
+        "missing": [user_id for user_id in ids if user_id not in found],
+    }
+
+
+def list_users(database_path: str, after_id: int = 0, limit: int = 50) -> Dict[str, Any]:
+    """
+    List users ordered by ID using keyset (seek) pagination.
+    
+    Each page is a primary-key range scan starting after ``after_id``,
+    so deep pages cost the same as the first one.
+    
+    Args:
+        database_path: Path to database file.
+        after_id: Return users with ID greater than this.
+        limit: Maximum users to return.
+        
+    Returns:
+        Dictionary with ``users`` and ``next_after_id`` (None on the last page).
+        
+    Raises:
+        sqlite3.Error: If database operation fails.
+        ValueError: If after_id or limit is invalid.
+    """
+    if not isinstance(after_id, int) or after_id < 0:
+        raise ValueError("after_id must be a non-negative integer")
+    if not isinstance(limit, int) or limit <= 0:
+        raise ValueError("limit must be a positive integer")
+    
+    try:
+        with get_db_connection(database_path) as conn:
+            # Fetch one extra row to know whether another page exists
+            rows = conn.execute(
+                "SELECT id, name FROM users WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit + 1)
+            ).fetchall()
+    except sqlite3.Error as e:
+        logger.error(f"Failed to list users after {after_id}: {e}", exc_info=True)
+        raise
+    
+    users = [{"id": row["id"], "name": row["name"]} for row in rows[:limit]]
+    has_more = len(rows) > limit
+    return {
+        "users": users,
+        "next_after_id": users[-1]["id"] if has_more else None,
+    }
+
+
+def iter_users(database_path: str, chunk_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over all users ordered by ID in constant memory.
+    
+    Rows are read in keyset chunks, each with its own short read on a
+    pooled connection, so no read transaction (or connection) is held
+    for the whole iteration and slow consumers never block writers or
+    WAL checkpoints.
+    
+    Args:
+        database_path: Path to database file.
+        chunk_size: Rows fetched per query.
+        
+    Yields:
+        Dictionary with user data.
+        
+    Raises:
+        sqlite3.Error: If database operation fails.
+    """
+    after_id = 0
+    while True:
+        try:
+            with get_db_connection(database_path) as conn:
+                cursor = conn.execute(
+                    "SELECT id, name FROM users WHERE id > ? ORDER BY id LIMIT ?",
+                    (after_id, chunk_size)
+                )
+                rows = cursor.fetchmany(chunk_size)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to read users after {after_id}: {e}", exc_info=True)
+            raise
+        
+        for row in rows:
+            yield {"id": row["id"], "name": row["name"]}
+        
+        if len(rows) < chunk_size:
+            return
+        after_id = rows[-1]["id"]
+
+
 def get_user_by_name(name: str, database_path: str) -> Optional[Dict[str, Any]]:
     """
     Get user by name safely.
@@ -104,44 +503,253 @@ def get_user_by_name(name: str, database_path: str) -> Optional[Dict[str, Any]]:
     if not name or not isinstance(name, str):
         return None
     
+    key = (database_path, name.strip())
+    cached = _user_name_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+    
     try:
         with get_db_connection(database_path) as conn:
-            cursor = conn.execute(
-                "SELECT id, name FROM users WHERE name = ?",
-                (name.strip(),)
+            query = (
+                _USER_BY_NAME_NOCASE_SQL if _service_config()['USER_NAME_NOCASE']
+                else _USER_BY_NAME_SQL
             )
+            cursor = conn.execute(query, (name.strip(),))
             row = cursor.fetchone()
-            if row:
-                return {"id": row["id"], "name": row["name"]}
-            return None
+        if row:
+            user = {"id": row["id"], "name": row["name"]}
+            _user_name_cache.set(key, user)
+            _user_cache.set((database_path, user["id"]), user)
+            return dict(user)
+        return None
     except sqlite3.Error as e:
         logger.error(f"Failed to get user by name '{name}': {e}", exc_info=True)
         raise
 
 
-def set_user_active(user_id: int) -> None:
+def authenticate_user(name: str, password: str, database_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Check a user's password and upgrade its hash if needed.
+    
+    The row is found through the users.name index. Unknown names and
+    users without a password still cost one hash verification, so
+    timing does not reveal which names exist. When the stored hash is
+    weaker than the current policy it is replaced after a successful
+    login; a failed upgrade does not fail the login.
+    
+    Args:
+        name: User name.
+        password: Plain text password.
+        database_path: Path to database file.
+        
+    Returns:
+        Dictionary with user data, or None if the credentials are invalid.
+        
+    Raises:
+        sqlite3.Error: If database operation fails.
+        HashingUnavailableError: If the password cannot be verified in time.
+    """
+    if not name or not isinstance(name, str) or not isinstance(password, str):
+        return None
+    
+    try:
+        with get_db_connection(database_path) as conn:
+            query = (
+                _CREDENTIALS_BY_NAME_NOCASE_SQL if _service_config()['USER_NAME_NOCASE']
+                else _CREDENTIALS_BY_NAME_SQL
+            )
+            row = conn.execute(query, (name.strip(),)).fetchone()
+    except sqlite3.Error as e:
+        logger.error(f"Failed to load credentials for '{name[:20]}': {e}", exc_info=True)
+        raise
+    
+    if row is None or not row["password_hash"]:
+        verify_dummy_password(password)
+        return None
+    
+    stored_hash = row["password_hash"]
+    if not verify_password(stored_hash, password):
+        return None
+    
+    if needs_rehash(stored_hash):
+        try:
+            new_hash = hash_password(password)
+            with get_db_connection(database_path) as conn:
+                # Only replace the hash that was verified (concurrent logins)
+                conn.execute(
+                    "UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?",
+                    (new_hash, row["id"], stored_hash)
+                )
+            logger.info(f"Upgraded password hash for user ID: {row['id']}")
+        except Exception as e:
+            logger.warning(f"Failed to upgrade password hash for user {row['id']}: {e}")
+    
+    return {"id": row["id"], "name": row["name"]}
+
+
+def _active_registry(database_path: str) -> ActiveUserRegistry:
+    """Get the shared active user registry for a database."""
+    config = _service_config()
+    return get_registry(
+        database_path,
+        capacity=config['ACTIVE_USERS_CAPACITY'],
+        flush_interval=config['ACTIVE_USERS_FLUSH_INTERVAL'],
+        bucket_seconds=config['ACTIVE_USERS_BUCKET_SECONDS'],
+        retention=max(config['ACTIVE_USERS_WINDOWS'], default=900),
+        sketch_precision=config['ACTIVITY_SKETCH_PRECISION'],
+        sketch_retention_days=config['ACTIVITY_SKETCH_RETENTION_DAYS']
+    )
+
+
+def set_user_active(user_id: int, database_path: str) -> None:
     """
-    Thread-safe active user tracking.
+    Mark a user as active now.
     
-    Maintains list of up to 5 active users.
+    Only updates an in-process buffer; the shared ``active_users`` table
+    is written by the registry's flush thread.
     
     Args:
         user_id: User ID to mark as active.
+        database_path: Path to database file.
+    """
+    _active_registry(database_path).touch(user_id)
+
+
+def get_active_users(database_path: str, limit: int = 100) -> List[Dict[str, Any]]:
+    """
+    Get recently active users across all workers, most recent first.
+    
+    Args:
+        database_path: Path to database file.
+        limit: Maximum number of users.
+        
+    Returns:
+        List of dictionaries with ``id`` and ``last_active_at`` (Unix time).
+        
+    Raises:
+        sqlite3.Error: If database operation fails.
+    """
+    return [
+        {'id': user_id, 'last_active_at': seen_at}
+        for user_id, seen_at in _active_registry(database_path).recent(limit)
+    ]
+
+
+def get_active_users_stats(database_path: str) -> Dict[str, int]:
+    """
+    Get the number of tracked active users and the capacity.
+    
+    Args:
+        database_path: Path to database file.
+        
+    Returns:
+        Dictionary with ``tracked`` and ``capacity``.
+        
+    Raises:
+        sqlite3.Error: If database operation fails.
+    """
+    registry = _active_registry(database_path)
+    return {'tracked': registry.count(), 'capacity': registry.capacity}
+
+
+def get_active_user_counts(database_path: str) -> Dict[str, Any]:
+    """
+    Count distinct users active in each configured sliding window.
+    
+    Args:
+        database_path: Path to database file.
+        
+    Returns:
+        Dictionary with ``windows`` (list of ``seconds``/``users`` pairs,
+        shortest first) and ``bucket_seconds``.
+        
+    Raises:
+        sqlite3.Error: If database operation fails.
+    """
+    registry = _active_registry(database_path)
+    counts = registry.window_counts(_service_config()['ACTIVE_USERS_WINDOWS'])
+    return {
+        'windows': [{'seconds': window, 'users': users} for window, users in counts.items()],
+        'bucket_seconds': registry.bucket_seconds,
+    }
+
+
+def get_distinct_active_users(database_path: str, period: str, periods: int) -> Dict[str, Any]:
+    """
+    Estimate distinct active users per hour or day (HyperLogLog, ~1% error).
+    
+    Args:
+        database_path: Path to database file.
+        period: Period kind, ``hour`` or ``day``.
+        periods: Number of most recent periods, capped at the retention and
+            at ``SKETCH_MAX_PERIODS`` (168 hours or 31 days).
+        
+    Returns:
+        Dictionary with ``period``, ``periods`` (``start``/``users``, newest
+        first) and ``total`` distinct users over the whole range.
+        
+    Raises:
+        ValueError: If the period kind or count is invalid.
+        sqlite3.Error: If database operation fails.
     """
-    with _active_users_lock:
-        if user_id not in _active_users:
-            _active_users.append(user_id)
-        if len(_active_users) > 5:
-            _active_users.pop(0)
+    if period not in SKETCH_PERIODS:
+        raise ValueError(f"period must be one of: {', '.join(SKETCH_PERIODS)}")
+    if periods <= 0:
+        raise ValueError("periods must be a positive integer")
+    
+    retention_days = _service_config()['ACTIVITY_SKETCH_RETENTION_DAYS']
+    periods = min(
+        periods,
+        SKETCH_MAX_PERIODS[period],
+        max(1, retention_days * 86400 // SKETCH_PERIODS[period])
+    )
+    return {'period': period, **_active_registry(database_path).distinct_counts(period, periods)}
+
+
+def record_user_lookup(user_id: int) -> None:
+    """
+    Count a lookup of a user ID for heavy-hitter tracking.
+    
+    Args:
+        user_id: Requested user ID (found or not).
+    """
+    _hot_users.add(user_id)
 
 
-def get_active_users() -> List[int]:
+def get_runtime_stats() -> Dict[str, Any]:
     """
-    Get list of active user IDs (thread-safe).
+    Get this worker's connection pool, user cache, writer and hashing
+    pool statistics.
     
     Returns:
-        List of active user IDs.
+        Dictionary with ``pools`` and ``writers`` (database path ->
+        statistics), ``caches`` (cache name -> statistics) and
+        ``hash_pool`` (hashing pool settings).
     """
-    with _active_users_lock:
-        return _active_users.copy()
+    return {
+        'pools': get_pool_stats(),
+        'caches': get_cache_stats(),
+        'writers': get_writer_stats(),
+        'hash_pool': get_executor_stats(),
+    }
 
+
+def get_hot_users(limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Get the most requested user IDs of this worker's recent traffic.
+    
+    Args:
+        limit: Maximum number of IDs (``HOT_USERS_TOP_K`` if None).
+        
+    Returns:
+        Dictionary with ``users`` (``id``/``count``, heaviest first) and
+        sketch statistics; counts are decayed estimates that may exceed
+        the true value by up to ``error_bound``.
+    """
+    return {
+        'users': [
+            {'id': user_id, 'count': round(count, 2)}
+            for user_id, count in _hot_users.top(limit)
+        ],
+        **_hot_users.stats(),
+    }
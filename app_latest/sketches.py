@@ -0,0 +1,408 @@
+"""
+Probabilistic sketches for high-volume activity statistics.
+
+``HyperLogLog`` estimates the number of distinct items in a stream using
+``2 ** precision`` one-byte registers: the standard error is about
+``1.04 / sqrt(2 ** precision)`` (1.15% in 8 KiB at the default precision
+13). Sketches are mergeable (the merge of two sketches equals the sketch
+of the union of their streams) and serialise to compact bytes, so each
+worker can keep its own sketch and combine them in shared storage.
+
+``CountMinSketch`` estimates per-item frequencies in fixed memory
+(``width * depth`` counters), never underestimating; with ``width`` w the
+overestimate is at most ``e / w`` of the total count with probability
+``1 - exp(-depth)``. ``HeavyHitters`` pairs it with a top-K heap and
+exponential decay to track the most frequent items of recent traffic.
+"""
+
+import hashlib
+import heapq
+import math
+import threading
+import time
+from array import array
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+MIN_PRECISION = 4
+MAX_PRECISION = 16
+DEFAULT_PRECISION = 13
+
+# Bits of the item hash; the first `precision` select the register
+_HASH_BITS = 64
+
+
+def _hash64(item: Hashable) -> int:
+    """Get a stable 64-bit hash of an item (same value in every process)."""
+    digest = hashlib.blake2b(repr(item).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def _bytewise_max(left: bytes, right: bytes) -> bytearray:
+    """
+    Get the per-byte maximum of two equal-length byte strings below 0x80.
+    
+    Works on the whole string as one big integer (SWAR) instead of a
+    Python-level loop: ``(a | 0x80) - b`` has its high bit set exactly
+    where ``a >= b``, and no byte borrows from its neighbour.
+    """
+    size = len(left)
+    a = int.from_bytes(left, 'big')
+    b = int.from_bytes(right, 'big')
+    high_bits = int.from_bytes(b'\x80' * size, 'big')
+    mask = ((((a | high_bits) - b) & high_bits) >> 7) * 0xFF
+    return bytearray(((a & mask) | (b & ~mask)).to_bytes(size, 'big'))
+
+
+def _hash_pair(item: Hashable) -> Tuple[int, int]:
+    """Get two independent stable 64-bit hashes of an item."""
+    digest = hashlib.blake2b(repr(item).encode('utf-8'), digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct-count sketch (not thread-safe).
+    
+    ``add`` is O(1); ``merge`` and ``count`` run as C-level passes over
+    the registers rather than per-register Python code.
+    """
+    
+    def __init__(self, precision: int = DEFAULT_PRECISION) -> None:
+        if not MIN_PRECISION <= precision <= MAX_PRECISION:
+            raise ValueError(
+                f"HyperLogLog precision must be between {MIN_PRECISION} and {MAX_PRECISION}"
+            )
+        
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+    
+    def add(self, item: Hashable) -> None:
+        """
+        Add an item to the sketch.
+        
+        Args:
+            item: Item to count; equal items must have equal ``repr``.
+        """
+        hashed = _hash64(item)
+        width = _HASH_BITS - self.precision
+        index = hashed >> width
+        remainder = hashed & ((1 << width) - 1)
+        # Position of the first 1 bit in the remaining bits (width + 1 if none)
+        rank = width - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+    
+    def update(self, items: Iterable[Hashable]) -> None:
+        """
+        Add several items to the sketch.
+        
+        Args:
+            items: Items to count.
+        """
+        for item in items:
+            self.add(item)
+    
+    def count(self) -> int:
+        """
+        Estimate the number of distinct items added.
+        
+        Returns:
+            Estimated distinct count.
+        """
+        m = len(self.registers)
+        if m >= 128:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        else:
+            alpha = {16: 0.673, 32: 0.697, 64: 0.709}[m]
+        
+        # Histogram of register values: a few C-level scans instead of m float pows
+        max_rank = _HASH_BITS - self.precision + 1
+        histogram = [self.registers.count(value) for value in range(max_rank + 1)]
+        estimate = alpha * m * m / sum(
+            count * 2.0 ** -value for value, count in enumerate(histogram) if count
+        )
+        zeros = histogram[0]
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction: linear counting over empty registers
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+    
+    def fold(self, precision: int) -> 'HyperLogLog':
+        """
+        Get an equivalent sketch with lower precision.
+        
+        Args:
+            precision: Target precision, not above the current one.
+            
+        Returns:
+            New sketch, equal to the one built from the same items at
+            ``precision``.
+        """
+        if precision > self.precision:
+            raise ValueError("Cannot fold a HyperLogLog to a higher precision")
+        
+        folded = HyperLogLog(precision)
+        shift = self.precision - precision
+        low_mask = (1 << shift) - 1
+        for index, register in enumerate(self.registers):
+            if not register:
+                continue
+            low_bits = index & low_mask
+            # Dropped index bits move to the front of the remaining hash bits
+            rank = shift - low_bits.bit_length() + 1 if low_bits else shift + register
+            target = index >> shift
+            if rank > folded.registers[target]:
+                folded.registers[target] = rank
+        return folded
+    
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """
+        Get the sketch of the union of this sketch's and another's items.
+        
+        Sketches of different precision are merged at the lower one.
+        
+        Args:
+            other: Sketch to merge with.
+            
+        Returns:
+            New merged sketch.
+        """
+        precision = min(self.precision, other.precision)
+        left = self.fold(precision) if self.precision != precision else self
+        right = other.fold(precision) if other.precision != precision else other
+        
+        merged = HyperLogLog(precision)
+        # Ranks never exceed 64, so registers fit the SWAR precondition
+        merged.registers = _bytewise_max(left.registers, right.registers)
+        return merged
+    
+    def to_bytes(self) -> bytes:
+        """
+        Serialise the sketch.
+        
+        Returns:
+            One precision byte followed by the registers.
+        """
+        return bytes([self.precision]) + bytes(self.registers)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'HyperLogLog':
+        """
+        Load a sketch serialised with ``to_bytes``.
+        
+        Args:
+            data: Serialised sketch.
+            
+        Returns:
+            Deserialised sketch.
+            
+        Raises:
+            ValueError: If the data is not a valid sketch.
+        """
+        if not data:
+            raise ValueError("Empty HyperLogLog data")
+        sketch = cls(data[0])
+        if len(data) != 1 + len(sketch.registers):
+            raise ValueError("HyperLogLog data has the wrong length")
+        sketch.registers = bytearray(data[1:])
+        return sketch
+
+
+class CountMinSketch:
+    """
+    Count-Min frequency sketch with float counters (not thread-safe).
+    
+    Float counters allow ``decay`` to age old traffic out. ``add`` and
+    ``estimate`` are O(depth); ``decay`` is O(width * depth).
+    """
+    
+    def __init__(self, width: int = 2048, depth: int = 4) -> None:
+        if width < 1 or depth < 1:
+            raise ValueError("Count-Min width and depth must be at least 1")
+        
+        self.width = width
+        self.depth = depth
+        self.total = 0.0
+        self._rows = [array('d', bytes(8 * width)) for _ in range(depth)]
+    
+    def _indexes(self, item: Hashable) -> List[int]:
+        """Get the counter index of an item in each row (double hashing)."""
+        first, second = _hash_pair(item)
+        return [(first + row * second) % self.width for row in range(self.depth)]
+    
+    def add(self, item: Hashable, count: float = 1.0) -> float:
+        """
+        Count an item.
+        
+        Args:
+            item: Item to count; equal items must have equal ``repr``.
+            count: Amount to add.
+            
+        Returns:
+            Estimated count of the item after the update.
+        """
+        estimate = math.inf
+        for row, index in zip(self._rows, self._indexes(item)):
+            row[index] += count
+            estimate = min(estimate, row[index])
+        self.total += count
+        return estimate
+    
+    def estimate(self, item: Hashable) -> float:
+        """
+        Estimate an item's count (never below the true count).
+        
+        Args:
+            item: Item to look up.
+            
+        Returns:
+            Estimated count.
+        """
+        return min(row[index] for row, index in zip(self._rows, self._indexes(item)))
+    
+    def decay(self, factor: float) -> None:
+        """
+        Multiply every counter by ``factor`` to age out old counts.
+        
+        Args:
+            factor: Multiplier between 0 and 1.
+        """
+        for row in self._rows:
+            for index in range(self.width):
+                row[index] *= factor
+        self.total *= factor
+    
+    def error_bound(self) -> float:
+        """
+        Get the likely maximum overestimate of any item's count.
+        
+        Returns:
+            ``e / width`` of the total count.
+        """
+        return math.e / self.width * self.total
+
+
+class HeavyHitters:
+    """
+    Thread-safe top-K frequent items over exponentially decayed counts.
+    
+    Counts are estimated with a ``CountMinSketch``; the K items with the
+    highest estimates are kept in a dict plus a lazily pruned min-heap, so
+    ``add`` is O(depth + log K) amortised. Every ``decay_interval``
+    seconds all counts are multiplied by ``decay_factor``, so the ranking
+    follows recent traffic in fixed memory.
+    """
+    
+    def __init__(
+        self,
+        k: int = 100,
+        width: int = 2048,
+        depth: int = 4,
+        decay_interval: float = 60.0,
+        decay_factor: float = 0.5
+    ) -> None:
+        if k < 1:
+            raise ValueError("Heavy hitter k must be at least 1")
+        if not 0.0 < decay_factor <= 1.0:
+            raise ValueError("Decay factor must be in (0, 1]")
+        
+        self.k = k
+        self.decay_interval = decay_interval
+        self.decay_factor = decay_factor
+        self.sketch = CountMinSketch(width, depth)
+        
+        self._top: Dict[Hashable, float] = {}
+        # (estimate, item) entries; stale ones are skipped when popped
+        self._heap: List[Tuple[float, Hashable]] = []
+        self._last_decay = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _maybe_decay(self) -> None:
+        """Apply the decay steps that are due (caller holds the lock)."""
+        if self.decay_interval <= 0 or self.decay_factor == 1.0:
+            return
+        steps = int((time.monotonic() - self._last_decay) // self.decay_interval)
+        if steps <= 0:
+            return
+        
+        factor = self.decay_factor ** steps
+        self._last_decay += steps * self.decay_interval
+        self.sketch.decay(factor)
+        self._top = {item: count * factor for item, count in self._top.items()}
+        self._rebuild_heap()
+    
+    def _rebuild_heap(self) -> None:
+        """Rebuild the heap from the current top items (caller holds the lock)."""
+        self._heap = [(count, item) for item, count in self._top.items()]
+        heapq.heapify(self._heap)
+    
+    def _pop_min(self) -> Tuple[float, Hashable]:
+        """Remove and return the lowest live top entry (caller holds the lock)."""
+        while True:
+            count, item = heapq.heappop(self._heap)
+            if self._top.get(item) == count:
+                del self._top[item]
+                return count, item
+    
+    def _peek_min(self) -> float:
+        """Get the lowest live top estimate (caller holds the lock)."""
+        while self._top.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0]
+    
+    def add(self, item: Hashable, count: float = 1.0) -> None:
+        """
+        Count an item and update the top-K set.
+        
+        Args:
+            item: Item to count.
+            count: Amount to add.
+        """
+        with self._lock:
+            self._maybe_decay()
+            estimate = self.sketch.add(item, count)
+            
+            if item not in self._top and len(self._top) >= self.k:
+                if estimate <= self._peek_min():
+                    return
+                self._pop_min()
+            
+            self._top[item] = estimate
+            heapq.heappush(self._heap, (estimate, item))
+            if len(self._heap) > 4 * self.k:
+                self._rebuild_heap()
+    
+    def top(self, limit: Optional[int] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Get the heaviest items.
+        
+        Args:
+            limit: Maximum number of items (K if None).
+            
+        Returns:
+            List of (item, decayed estimated count), heaviest first.
+        """
+        with self._lock:
+            self._maybe_decay()
+            ranked = sorted(self._top.items(), key=lambda entry: entry[1], reverse=True)
+        return ranked[:limit] if limit is not None else ranked
+    
+    def stats(self) -> Dict[str, float]:
+        """
+        Get sketch settings and error bound.
+        
+        Returns:
+            Dictionary with K, sketch size, decayed total and error bound.
+        """
+        with self._lock:
+            self._maybe_decay()
+            return {
+                'k': self.k,
+                'width': self.sketch.width,
+                'depth': self.sketch.depth,
+                'decay_interval': self.decay_interval,
+                'decay_factor': self.decay_factor,
+                'total': self.sketch.total,
+                'error_bound': self.sketch.error_bound(),
+            }
@@ -0,0 +1,233 @@
+"""
+SQL statement timing, aggregation and slow-query logging.
+
+When ``SQL_TIMING_ENABLED`` is set, pooled connections are opened with
+the ``TimedConnection`` factory, which times every ``execute``,
+``executemany`` and ``commit`` and aggregates the timings by normalised
+SQL text (literals replaced by ``?``). A statement slower than
+``SQL_SLOW_QUERY_MS`` is logged with its ``EXPLAIN QUERY PLAN``; with
+``SQL_WARN_ON_SCAN`` every statement is also explained the first time it
+is seen in a process and a warning is logged if it scans a whole table.
+
+Timings cover the statement's execution up to its first result row;
+rows fetched afterwards are not included. ``sqlite3``'s trace callback
+is not used because it reports statement text without durations.
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Set
+
+
+logger = logging.getLogger(__name__)
+
+# Distinct normalised statements tracked per process; the rest are pooled
+MAX_TRACKED_STATEMENTS = 1000
+_OTHER_STATEMENTS = '<other>'
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+# Plan rows of a full table scan ("SCAN users"; index scans say "USING"),
+# ignoring SQLite's own schema tables
+_FULL_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW|sqlite_)(\S+)$")
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'WITH')
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """
+    Normalise SQL text for aggregation.
+    
+    Literals become ``?``, ``IN (?, ?, ...)`` lists collapse to ``IN (?...)``
+    and whitespace is collapsed.
+    
+    Args:
+        sql: SQL statement.
+        
+    Returns:
+        Normalised statement.
+    """
+    normalized = _STRING_LITERAL.sub('?', sql)
+    normalized = _NUMBER_LITERAL.sub('?', normalized)
+    normalized = _WHITESPACE.sub(' ', normalized).strip()
+    return _IN_LIST.sub('(?...)', normalized)
+
+
+class QueryStats:
+    """
+    Thread-safe per-statement timing aggregates.
+    """
+    
+    def __init__(self, max_statements: int = MAX_TRACKED_STATEMENTS) -> None:
+        self.max_statements = max_statements
+        # normalised SQL -> [calls, total seconds, max seconds, slow calls]
+        self._data: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+    
+    def record(self, statement: str, seconds: float, slow: bool) -> None:
+        """
+        Add one execution of a normalised statement.
+        
+        Args:
+            statement: Normalised SQL.
+            seconds: Execution time.
+            slow: Whether it exceeded the slow-query threshold.
+        """
+        with self._lock:
+            entry = self._data.get(statement)
+            if entry is None:
+                if len(self._data) >= self.max_statements:
+                    statement = _OTHER_STATEMENTS
+                    entry = self._data.get(statement)
+                if entry is None:
+                    entry = self._data[statement] = [0, 0.0, 0.0, 0]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            entry[3] += slow
+    
+    def top(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Get the statements with the highest total time.
+        
+        Args:
+            limit: Maximum number of statements.
+            
+        Returns:
+            List of dictionaries with the statement, call count, total,
+            mean and max time in milliseconds, and slow call count.
+        """
+        with self._lock:
+            entries = sorted(self._data.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return [
+            {
+                'sql': statement,
+                'calls': int(calls),
+                'total_ms': round(total * 1000.0, 3),
+                'mean_ms': round(total / calls * 1000.0, 3),
+                'max_ms': round(longest * 1000.0, 3),
+                'slow_calls': int(slow),
+            }
+            for statement, (calls, total, longest, slow) in entries
+        ]
+    
+    def reset(self) -> None:
+        """Drop all aggregates."""
+        with self._lock:
+            self._data.clear()
+
+
+query_stats = QueryStats()
+
+# Statements already checked for full table scans in this process
+_explained: Set[str] = set()
+_explained_lock = threading.Lock()
+
+
+class TimedConnection(sqlite3.Connection):
+    """
+    ``sqlite3.Connection`` that times statements into ``query_stats``.
+    
+    Pass as ``factory`` to ``sqlite3.connect``, then set
+    ``slow_query_seconds`` and ``warn_on_scan`` on the connection.
+    """
+    
+    slow_query_seconds: float = 0.1
+    warn_on_scan: bool = True
+    
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._record(sql, parameters, time.perf_counter() - started)
+    
+    def executemany(self, sql: str, seq_of_parameters: Iterable[Any]) -> sqlite3.Cursor:
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._record(sql, None, time.perf_counter() - started)
+    
+    def commit(self) -> None:
+        started = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            self._record('COMMIT', None, time.perf_counter() - started)
+    
+    def _record(self, sql: str, parameters: Any, seconds: float) -> None:
+        """
+        Aggregate one execution, logging it if slow or a new table scan.
+        
+        Args:
+            sql: Executed SQL.
+            parameters: Bound parameters (None if unavailable).
+            seconds: Execution time.
+        """
+        statement = normalize_sql(sql)
+        slow = seconds >= self.slow_query_seconds
+        query_stats.record(statement, seconds, slow)
+        
+        first_sighting = False
+        if self.warn_on_scan:
+            with _explained_lock:
+                if statement not in _explained and len(_explained) < MAX_TRACKED_STATEMENTS:
+                    _explained.add(statement)
+                    first_sighting = True
+        
+        if not (slow or first_sighting):
+            return
+        
+        plan = self._explain(sql, parameters)
+        if slow:
+            logger.warning(
+                f"Slow SQL ({seconds * 1000.0:.1f} ms): {statement}"
+                + (f" | plan: {'; '.join(plan)}" if plan else "")
+            )
+        elif any(_FULL_SCAN.match(detail) for detail in plan):
+            logger.warning(f"SQL scans a full table: {statement} | plan: {'; '.join(plan)}")
+    
+    def _explain(self, sql: str, parameters: Any) -> List[str]:
+        """
+        Get a statement's query plan.
+        
+        Args:
+            sql: Executed SQL.
+            parameters: Bound parameters (None if unavailable).
+            
+        Returns:
+            Plan detail lines, or an empty list if it cannot be explained.
+        """
+        if parameters is None or not sql.lstrip().upper().startswith(_EXPLAINABLE):
+            return []
+        try:
+            rows = super().execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+        except sqlite3.Error as e:
+            logger.debug(f"Cannot explain {normalize_sql(sql)}: {e}")
+            return []
+        return [str(row[3]) for row in rows]
+
+
+def get_query_stats(limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    Get this process's statement timings, highest total time first.
+    
+    Args:
+        limit: Maximum number of statements.
+        
+    Returns:
+        List of per-statement aggregates.
+    """
+    return query_stats.top(limit)
+
+
+def reset_query_stats() -> None:
+    """Drop this process's statement timings."""
+    query_stats.reset()
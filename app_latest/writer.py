@@ -0,0 +1,256 @@
+"""
+Group-commit write queue.
+
+A single writer thread per process and database drains queued write
+requests and applies them in small batches, one transaction and one
+commit per batch, so concurrent writers share fsyncs instead of
+contending for SQLite's write lock.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app_latest.database import get_db_connection
+
+
+logger = logging.getLogger(__name__)
+
+# Applies a batch of items on a connection inside an open transaction and
+# returns one result per item (an Exception instance marks a failed item)
+BatchHandler = Callable[[sqlite3.Connection, List[Any]], List[Any]]
+
+_STOP = object()
+
+
+class GroupCommitWriter:
+    """
+    Background thread that commits queued writes in batches.
+    
+    A batch is flushed once it holds ``max_batch`` items or ``max_delay_ms``
+    milliseconds after its first item arrived, whichever comes first.
+    """
+    
+    def __init__(
+        self,
+        database_path: str,
+        handler: BatchHandler,
+        max_batch: int = 64,
+        max_delay_ms: float = 2.0,
+        max_queue: int = 1024
+    ) -> None:
+        self.database_path = database_path
+        self.handler = handler
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max(0.0, max_delay_ms) / 1000.0
+        
+        self._queue: 'queue.Queue[Any]' = queue.Queue(maxsize=max_queue)
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, int] = {'items': 0, 'batches': 0, 'failed_batches': 0}
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"group-commit-writer:{database_path}",
+            daemon=True
+        )
+        self._thread.start()
+    
+    def submit(self, item: Any, timeout: Optional[float] = None) -> 'Future[Any]':
+        """
+        Queue an item for the next batch.
+        
+        Args:
+            item: Item passed to the batch handler.
+            timeout: Seconds to wait for queue space.
+            
+        Returns:
+            Future resolved with the item's result once its batch commits.
+            
+        Raises:
+            sqlite3.OperationalError: If the queue stays full for ``timeout``.
+        """
+        future: 'Future[Any]' = Future()
+        try:
+            self._queue.put((item, future), timeout=timeout)
+        except queue.Full:
+            raise sqlite3.OperationalError("Write queue is full")
+        return future
+    
+    def _collect(self) -> Optional[List[Tuple[Any, 'Future[Any]']]]:
+        """
+        Block for the next batch of queued items.
+        
+        Returns:
+            List of (item, future) pairs, or None when the writer is stopping.
+        """
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    entry = self._queue.get(timeout=remaining)
+                else:
+                    entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                self._queue.put(_STOP)  # Stop after flushing this batch
+                break
+            batch.append(entry)
+        return batch
+    
+    def _flush(self, batch: List[Tuple[Any, 'Future[Any]']]) -> None:
+        """
+        Apply one batch in a single transaction and resolve its futures.
+        
+        Args:
+            batch: List of (item, future) pairs.
+        """
+        live = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+        if not live:
+            return
+        
+        try:
+            with get_db_connection(self.database_path) as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                results = self.handler(conn, [item for item, _ in live])
+        except Exception as e:
+            with self._stats_lock:
+                self._stats['failed_batches'] += 1
+            for _, future in live:
+                future.set_exception(e)
+            return
+        
+        with self._stats_lock:
+            self._stats['items'] += len(live)
+            self._stats['batches'] += 1
+        
+        for (_, future), result in zip(live, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+    
+    def _run(self) -> None:
+        """Writer thread main loop."""
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            try:
+                self._flush(batch)
+            except Exception as e:  # Keep the writer alive for later batches
+                logger.error(f"Group commit writer error: {e}", exc_info=True)
+    
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the writer after flushing already queued items.
+        
+        Args:
+            timeout: Seconds to wait for the writer thread to finish.
+        """
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get writer statistics.
+        
+        Returns:
+            Dictionary with queue depth and batch counters.
+        """
+        with self._stats_lock:
+            batches = self._stats['batches']
+            return {
+                'queued': self._queue.qsize(),
+                'max_batch': self.max_batch,
+                'max_delay_ms': self.max_delay * 1000.0,
+                'avg_batch_size': self._stats['items'] / batches if batches else 0.0,
+                **self._stats,
+            }
+
+
+# Writers are per worker process: threads do not survive a fork
+_writers: Dict[str, GroupCommitWriter] = {}
+_writers_pid: Optional[int] = None
+_writers_lock = threading.Lock()
+
+
+def get_writer(
+    database_path: str,
+    handler: BatchHandler,
+    max_batch: int = 64,
+    max_delay_ms: float = 2.0
+) -> GroupCommitWriter:
+    """
+    Get (or lazily start) the writer for a database in this process.
+    
+    Args:
+        database_path: Path to SQLite database file.
+        handler: Batch handler used if the writer has to be started.
+        max_batch: Maximum items per batch for a new writer.
+        max_delay_ms: Maximum batching delay for a new writer.
+        
+    Returns:
+        Group-commit writer owned by the current process.
+    """
+    global _writers_pid
+    
+    with _writers_lock:
+        if _writers_pid != os.getpid():
+            _writers.clear()
+            _writers_pid = os.getpid()
+        
+        writer = _writers.get(database_path)
+        if writer is None:
+            writer = GroupCommitWriter(
+                database_path,
+                handler,
+                max_batch=max_batch,
+                max_delay_ms=max_delay_ms,
+                max_queue=max_batch * 16
+            )
+            _writers[database_path] = writer
+        return writer
+
+
+def get_writer_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get statistics for every writer in this process.
+    
+    Returns:
+        Dictionary mapping database path to writer statistics.
+    """
+    with _writers_lock:
+        if _writers_pid != os.getpid():
+            return {}
+        writers = dict(_writers)
+    return {path: writer.stats() for path, writer in writers.items()}
+
+
+def close_all_writers(timeout: Optional[float] = None) -> None:
+    """
+    Stop every writer in this process after flushing queued items.
+    
+    Args:
+        timeout: Seconds to wait for each writer thread.
+    """
+    with _writers_lock:
+        writers = list(_writers.values()) if _writers_pid == os.getpid() else []
+        _writers.clear()
+    for writer in writers:
+        writer.close(timeout)
+
+
+# Commit queued inserts when a worker exits normally
+atexit.register(close_all_writers)
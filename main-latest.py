@@ -8,8 +8,70 @@ Environment variables:
     DATABASE_PATH: Path to SQLite database (default: secure_app.db)
     DEBUG: Enable debug mode (default: False)
     MAX_NAME_LENGTH: Maximum user name length (default: 255)
-    INIT_DB_ON_START: Initialize DB on startup (default: True)
+    MIN_PASSWORD_LENGTH: Minimum password length (default: 8)
+    PASSWORD_HASH_METHOD: pbkdf2 or scrypt for new hashes (default: pbkdf2)
+    PASSWORD_HASH_ITERATIONS: PBKDF2-SHA256 iterations for new hashes, at least
+        600000; lower values are rejected (default: from HASH_CALIBRATION_FILE,
+        else 600000)
+    SCRYPT_N, SCRYPT_R, SCRYPT_P: scrypt cost parameters (default: 32768, 8, 1)
+    HASH_CALIBRATION_FILE: JSON file written by python -m app_latest.calibrate
+    MAX_BATCH_IDS: Maximum IDs per GET /users?ids= request (default: 1000)
+    MAX_PAGE_SIZE: Maximum page size for GET /users listing (default: 100)
+    EXPORT_CHUNK_SIZE: Rows read per query by GET /users/export (default: 1000)
+    MAX_BATCH_SIZE: Maximum names per POST /users:batch request (default: 1000)
+    MAX_BATCH_BODY_SIZE: Body size limit in bytes for POST /users:batch (default: 1048576)
+    USER_NAME_NOCASE: Case-insensitive unique user names, read by migration 0002
+        (default: False)
+    INIT_DB_ON_START: Apply pending migrations on startup (default: True)
     LOG_LEVEL: Logging level (default: INFO)
+    DB_POOL_MAX_SIZE: Max pooled SQLite connections per worker (default: 5)
+    DB_POOL_IDLE_TIMEOUT: Seconds before an idle connection is closed (default: 300)
+    DB_POOL_ACQUIRE_TIMEOUT: Seconds to wait for a free connection (default: 5)
+    DB_PRAGMA_PROFILE: SQLite PRAGMA preset, durable or fast (default: durable)
+    DB_JOURNAL_MODE, DB_SYNCHRONOUS, DB_CACHE_SIZE, DB_MMAP_SIZE, DB_TEMP_STORE,
+    DB_BUSY_TIMEOUT: Override individual PRAGMAs of the selected preset
+    WRITE_QUEUE_ENABLED: Batch add_user commits in a writer thread (default: False)
+    WRITE_QUEUE_MAX_BATCH: Maximum inserts per group commit (default: 64)
+    WRITE_QUEUE_MAX_DELAY_MS: Maximum wait to fill a batch, in ms (default: 2)
+    WRITE_QUEUE_TIMEOUT: Seconds a request waits for its commit (default: 10)
+    HASH_POOL_ENABLED: Hash passwords in a process pool (default: True)
+    HASH_POOL_WORKERS: Hashing processes per worker, 0 for CPU count divided by
+        WEB_CONCURRENCY, capped at 2 (default: 0)
+    HASH_POOL_QUEUE_SIZE: Outstanding hashing tasks, 0 for 2 x workers (default: 0)
+    HASH_POOL_TIMEOUT: Seconds to wait for a queue slot or a result (default: 5)
+    USER_CACHE_SIZE: Cached user rows per worker, 0 disables (default: 10000)
+    USER_CACHE_TTL: User cache TTL in seconds, 0 for none (default: 0)
+    NEGATIVE_CACHE_SIZE: Cached not-found user IDs per worker, 0 disables (default: 10000)
+    NEGATIVE_CACHE_TTL: Seconds a not-found user ID is cached (default: 5)
+    ACTIVE_USERS_CAPACITY: Recently active users kept in the shared active_users
+        table (default: 10000)
+    ACTIVE_USERS_FLUSH_INTERVAL: Seconds between coalesced activity writes per
+        worker (default: 1)
+    ACTIVE_USERS_WINDOWS: Comma-separated sliding windows in seconds for
+        GET /users/active/counts (default: 60,300,900)
+    ACTIVE_USERS_BUCKET_SECONDS: Time bucket width of the windows (default: 10)
+    ACTIVITY_SKETCH_PRECISION: HyperLogLog precision, 4-16, for distinct users per
+        hour/day; error ~1.04/sqrt(2^p) (default: 13)
+    ACTIVITY_SKETCH_RETENTION_DAYS: Days of hour/day sketches kept (default: 30)
+    HOT_USERS_TOP_K: Heavy-hitter user IDs tracked per worker (default: 100)
+    HOT_USERS_SKETCH_WIDTH, HOT_USERS_SKETCH_DEPTH: Count-Min sketch size
+        (default: 2048, 4)
+    HOT_USERS_DECAY_INTERVAL: Seconds between count decays, 0 disables (default: 60)
+    HOT_USERS_DECAY_FACTOR: Multiplier applied at each decay (default: 0.5)
+    SQL_TIMING_ENABLED: Time every SQL statement, see /admin/sql-stats (default: False)
+    SQL_SLOW_QUERY_MS: Log statements slower than this with their query plan
+        (default: 100)
+    SQL_WARN_ON_SCAN: With timing on, warn once per statement that scans a whole
+        table (default: True)
+    METRICS_ENABLED: Record request latency histograms for /metrics (default: True)
+    METRICS_DIR: Directory shared by workers for latency snapshots; clear it on
+        restart. Unset reports only the serving worker, labelled with its pid
+        (default: unset)
+    METRICS_WRITE_INTERVAL: Seconds between snapshot writes per worker (default: 5)
+    PROFILER_MAX_SECONDS: Longest /admin/profile sampling run (default: 25)
+    PROFILER_DIR: Directory shared by workers for profile results, created 0700
+        and refused if other users can access it (default: <DATABASE_PATH>.profiles)
+    ADMIN_TOKEN: Bearer token for /admin endpoints; unset disables them
 """
 
 import logging
@@ -30,7 +92,11 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-app = create_app()
+# The hashing pool starts its processes with "spawn", which re-runs this
+# script as __mp_main__ in every child; only the real process builds the app
+# (and runs migrations)
+if __name__ != '__mp_main__':
+    app = create_app()
 
 if __name__ == "__main__":
     # Only for development
@@ -0,0 +1,96 @@
+"""
+Tests for the HyperLogLog bit arithmetic behind cross-worker merges.
+
+``merge`` (SWAR byte-wise max) and ``fold`` (rank arithmetic when
+dropping index bits) are checked against straightforward reference
+implementations, and ``count`` against its standard error.
+"""
+
+import random
+
+import pytest
+
+from app_latest.sketches import MAX_PRECISION, MIN_PRECISION, HyperLogLog, _bytewise_max
+
+
+def _sketch(items, precision=12):
+    """Build a sketch from items."""
+    sketch = HyperLogLog(precision)
+    sketch.update(items)
+    return sketch
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_bytewise_max_matches_per_byte_max(seed):
+    rng = random.Random(seed)
+    size = rng.choice([1, 7, 16, 4096])
+    left = bytes(rng.randrange(0x80) for _ in range(size))
+    right = bytes(rng.randrange(0x80) for _ in range(size))
+    
+    assert _bytewise_max(left, right) == bytearray(map(max, left, right))
+
+
+def test_bytewise_max_edge_values():
+    values = bytes([0, 0x7F, 0x40, 0x3F, 0x01, 0x7F, 0])
+    other = bytes([0x7F, 0, 0x3F, 0x40, 0x01, 0x7F, 0])
+    
+    assert _bytewise_max(values, other) == bytearray(map(max, values, other))
+
+
+def test_merge_is_register_max_and_sketch_of_union():
+    left = _sketch(range(0, 6000))
+    right = _sketch(range(4000, 10000))
+    
+    merged = left.merge(right)
+    
+    assert merged.registers == bytearray(map(max, left.registers, right.registers))
+    assert merged.registers == _sketch(range(0, 10000)).registers
+    assert left.merge(HyperLogLog(12)).registers == left.registers
+
+
+@pytest.mark.parametrize('precision', [MIN_PRECISION, 8, 10, 11, 12])
+def test_fold_matches_sketch_built_at_lower_precision(precision):
+    items = range(20000)
+    
+    folded = _sketch(items, 12).fold(precision)
+    
+    assert folded.precision == precision
+    assert folded.registers == _sketch(items, precision).registers
+
+
+def test_merge_of_different_precisions_uses_the_lower_one():
+    merged = _sketch(range(5000), 14).merge(_sketch(range(3000, 8000), 10))
+    
+    assert merged.precision == 10
+    assert merged.registers == _sketch(range(8000), 10).registers
+
+
+def test_fold_to_higher_precision_is_rejected():
+    with pytest.raises(ValueError):
+        HyperLogLog(10).fold(11)
+
+
+@pytest.mark.parametrize('size', [0, 10, 1000, 20000, 200000])
+def test_count_within_error_bounds(size):
+    precision = 13
+    # Three standard errors, 1.04 / sqrt(m); hashes are deterministic
+    tolerance = 3 * 1.04 / (1 << precision) ** 0.5
+    
+    estimate = _sketch(range(size), precision).count()
+    
+    assert abs(estimate - size) <= max(1, tolerance * size)
+
+
+def test_serialisation_round_trip():
+    sketch = _sketch(range(1000))
+    
+    restored = HyperLogLog.from_bytes(sketch.to_bytes())
+    
+    assert restored.precision == sketch.precision
+    assert restored.registers == sketch.registers
+
+
+@pytest.mark.parametrize('precision', [MIN_PRECISION - 1, MAX_PRECISION + 1])
+def test_invalid_precision_is_rejected(precision):
+    with pytest.raises(ValueError):
+        HyperLogLog(precision)